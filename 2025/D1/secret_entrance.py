@@ -1,32 +1,16 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
 import multiprocessing as mp
+import numpy as np
 
-from datetime import datetime
 from functools import partial
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
-
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+from aoc.logger import Logger
 
 def read_file(path):
     result = []
@@ -38,6 +22,54 @@ def read_file(path):
             result.append(line)
     return result
 
+def stream_file(path, block_size=1 << 20):
+    remainder = ""
+    with open(path, "r") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            lines = (remainder + block).split("\n")
+            # The last line may continue in the next block
+            remainder = lines.pop()
+            for line in lines:
+                line = line.strip()
+                if line:
+                    yield line
+
+    remainder = remainder.strip()
+    if remainder:
+        yield remainder
+
+def solve_secretentrance_stream(rotary_sequence, logger):
+    mod = 100
+    dial_pointer = 50
+    password_one = 0
+    password_two = 0
+
+    for sequence in rotary_sequence:
+        direction = sequence[0]
+        value = int(sequence[1:])
+
+        new_dial_ptr = dial_pointer - value if direction == "L" else dial_pointer + value
+
+        # Same counting as solve_secretentrance_two, with the start always in [0, mod)
+        password_two += abs(new_dial_ptr // mod)
+        if direction == "L":
+            if new_dial_ptr % mod == 0:
+                password_two += 1
+            if dial_pointer == 0:
+                password_two -= 1
+
+        dial_pointer = new_dial_ptr % mod
+
+        if dial_pointer == 0:
+            password_one += 1
+
+    logger.debug(f"dial is now at {dial_pointer}. Password values: {password_one}, {password_two}")
+
+    return password_one, password_two
+
 def solve_secretentrance_one(rotary_sequence, logger):
     mod = 100
     dial_pointer = 50
@@ -50,13 +82,13 @@ def solve_secretentrance_one(rotary_sequence, logger):
         if direction == "L":
             value = mod - value
 
-        logger.debug(f"Start: {dial_pointer}, direction value: {value}")
+        logger.debug("Start: %s, direction value: %s", dial_pointer, value)
         dial_pointer = (dial_pointer + value) % (mod)
 
         if dial_pointer == 0:
             password += 1
 
-        logger.debug(f"dial is now at {dial_pointer}. Password value: {password}")
+        logger.debug("dial is now at %s. Password value: %s", dial_pointer, password)
 
     return password
 
@@ -87,10 +119,87 @@ def solve_secretentrance_two(rotary_sequence, logger):
             if old_dial_ptr % mod == 0:
                 password -= 1
 
-        logger.debug(f"dial is now at {dial_pointer}. Password value: {password}")
+        logger.debug("dial is now at %s. Password value: %s", dial_pointer, password)
 
     return password
 
+def parse_rotations(data):
+    # Every rotation is its letter followed right away by its digits
+    turns = np.flatnonzero((data == ord("L")) | (data == ord("R")))
+    is_digit = (data >= ord("0")) & (data <= ord("9"))
+    if not is_digit[turns + 1].all():
+        raise ValueError("Every rotation needs a number of clicks after its direction")
+
+    # The digits of a rotation stop at the first byte that is not a digit
+    run_ends = np.flatnonzero(is_digit[:-1] & ~is_digit[1:]) + 1
+    lengths = run_ends[np.searchsorted(run_ends, turns)] - turns - 1
+
+    # One digit column at a time, for every rotation at once
+    values = np.zeros(len(turns), dtype=np.int64)
+    for offset in range(1, int(lengths.max(initial=0)) + 1):
+        digits = data[np.minimum(turns + offset, len(data) - 1)].astype(np.int64) - ord("0")
+        values = np.where(offset <= lengths, values * 10 + digits, values)
+
+    # Left turns are negative, right turns positive
+    return np.where(data[turns] == ord("L"), -values, values)
+
+def read_rotations(path, block_size=1 << 22):
+    rotations = []
+    remainder = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if block:
+                # The last line may continue in the next block
+                text, _, remainder = (remainder + block).rpartition(b"\n")
+            else:
+                text, remainder = remainder, b""
+            rotations.append(parse_rotations(np.frombuffer(text + b"\n", dtype=np.uint8)))
+            if not block:
+                break
+    return np.concatenate(rotations)
+
+def get_dial_positions(rotations):
+    # Unwrapped dial positions, including the start position
+    positions = np.empty(len(rotations) + 1, dtype=np.int64)
+    positions[0] = 50
+    np.cumsum(rotations, out=positions[1:])
+    positions[1:] += 50
+    return positions
+
+def solve_secretentrance_one_vectorized(rotations, logger):
+    mod = 100
+    positions = get_dial_positions(rotations)[1:]
+
+    password = int(np.count_nonzero(positions % mod == 0))
+    logger.debug(f"Dial landed on 0 {password} times")
+
+    return password
+
+def solve_secretentrance_two_vectorized(rotations, logger):
+    mod = 100
+    positions = get_dial_positions(rotations)
+    old_positions = positions[:-1]
+    new_positions = positions[1:]
+
+    # Every hundred boundary between the old and the new position is a click on 0
+    password = int(np.abs(new_positions // mod - old_positions // mod).sum())
+
+    # Turning left, floor division counts leaving 0 but not landing on it
+    left = rotations < 0
+    password += int(np.count_nonzero(left & (new_positions % mod == 0)))
+    password -= int(np.count_nonzero(left & (old_positions % mod == 0)))
+
+    logger.debug(f"Dial clicked on 0 {password} times")
+
+    return password
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_secretentrance_one(read_file(path), logger),
+    2: lambda path, logger: solve_secretentrance_two(read_file(path), logger),
+}
+
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
     parser.add_argument("input_file", help="Path to the input file")
@@ -99,11 +208,33 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    parser.add_argument(
+        "-v", "--vectorized",
+        action="store_true",
+        help="Simulate the dial with NumPy arrays instead of one rotation at a time"
+    )
+    parser.add_argument(
+        "-s", "--stream",
+        action="store_true",
+        help="Solve both rounds in a single pass over the file without loading it"
+    )
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
 
+    if args.stream:
+        password_one, password_two = solve_secretentrance_stream(stream_file(args.input_file), logger)
+        logger.info(f"Password for round 1 : {password_one}")
+        logger.info(f"Password for round 2 : {password_two}")
+        return
+
+    if args.vectorized:
+        rotations = read_rotations(args.input_file)
+        logger.info(f"Password for round 1 : {solve_secretentrance_one_vectorized(rotations, logger)}")
+        logger.info(f"Password for round 2 : {solve_secretentrance_two_vectorized(rotations, logger)}")
+        return
+
     rotary_sequence = read_file(args.input_file)
 
     logger.info(rotary_sequence)
@@ -2,36 +2,18 @@
 
 import argparse
 import ast
-import itertools
-import multiprocessing as mp
+import math
 import numpy as np
+import os
 import sys
 
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
 from functools import partial
 from scipy.optimize import Bounds, LinearConstraint, milp
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
-
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+from aoc.executor import add_executor_arguments, configure_executor_from_args, get_executor
+from aoc.logger import Logger
 
 def read_file(path):
     result = []
@@ -68,40 +50,149 @@ def convert_buttons(button_sequence):
 
     return buttons
 
-def do_monkey_press(sequence, expected, logger):
-    state = [False for i in range(0, len(expected))]
-    press_count = 0
-
-    for index, button_press in enumerate(sequence):
-        press_count += 1
-        for press in button_press:
-            state[press] = not(state[press])
-
-    if state == expected and press_count == len(sequence):
-        logger.debug(f"Found: {sequence} leads to {expected} in {press_count} button presses")
-        return press_count, expected
-
-    # Monkey found nothing: DASDLKASLDKASLDKSADDJAKSICHICNHIEWQCNWEICFNWEC !
-    return 9999, expected
+def get_bitmask(indices):
+    return sum(1 << index for index in set(indices))
+
+def reduce_gf2(button_masks, target, num_lights):
+    num_buttons = len(button_masks)
+
+    # One equation per light: the buttons toggling it, then whether it ends lit
+    rows = []
+    for light in range(num_lights):
+        row = sum(1 << button for button, mask in enumerate(button_masks) if mask >> light & 1)
+        rows.append(row | (target >> light & 1) << num_buttons)
+
+    # Gauss-Jordan elimination, XOR is addition in GF(2)
+    pivots = []
+    for button in range(num_buttons):
+        pivot = next((index for index in range(len(pivots), len(rows)) if rows[index] >> button & 1), None)
+        if pivot is None:
+            continue
+        rank = len(pivots)
+        rows[rank], rows[pivot] = rows[pivot], rows[rank]
+        for index in range(len(rows)):
+            if index != rank and rows[index] >> button & 1:
+                rows[index] ^= rows[rank]
+        pivots.append(button)
+
+    if any(row >> num_buttons & 1 for row in rows[len(pivots):]):
+        return None, pivots
+    return rows[:len(pivots)], pivots
+
+def get_null_space(rows, pivots, num_buttons):
+    # Any solution is this one plus some combination of the null space basis
+    solution = sum(1 << button for row, button in zip(rows, pivots) if row >> num_buttons & 1)
+    basis = []
+    for free in sorted(set(range(num_buttons)) - set(pivots)):
+        basis.append(1 << free | sum(1 << button for row, button in zip(rows, pivots) if row >> free & 1))
+    return solution, basis
+
+def get_min_weight(solution, basis, num_buttons, block_bits=16):
+    low, high = basis[:block_bits], basis[block_bits:]
+
+    # Every combination of the low basis vectors at once, as one block
+    if num_buttons <= 64:
+        block = np.zeros(1, dtype=np.uint64)
+        for vector in low:
+            block = np.concatenate((block, block ^ np.uint64(vector)))
+    else:
+        block = [0]
+        for vector in low:
+            block += [combination ^ vector for combination in block]
+
+    # Gray code over the high ones, a single XOR from one block to the next
+    min_weight = num_buttons
+    shift = solution
+    for step in range(1 << len(high)):
+        if step:
+            shift ^= high[(step & -step).bit_length() - 1]
+        if num_buttons <= 64:
+            weight = int(np.bitwise_count(block ^ np.uint64(shift)).min())
+        else:
+            weight = min((combination ^ shift).bit_count() for combination in block)
+        min_weight = min(min_weight, weight)
+
+    return min_weight
+
+def is_member(states, sorted_states):
+    index = np.searchsorted(sorted_states, states).clip(max=len(sorted_states) - 1)
+    return sorted_states[index] == states
+
+def expand_layer(frontier, buttons, seen, pending_limit=1 << 20):
+    # One button at a time so temporaries stay the size of the frontier, the
+    # new states are deduplicated once they outgrow the layer found so far
+    layer = np.zeros(0, dtype=np.int64)
+    pending = []
+    pending_size = 0
+    for button in buttons:
+        states = frontier ^ button
+        states = states[~is_member(states, seen)]
+        pending.append(states)
+        pending_size += len(states)
+        if pending_size > max(len(layer), len(frontier), pending_limit):
+            layer = np.unique(np.concatenate([layer] + pending))
+            pending = []
+            pending_size = 0
+    return np.unique(np.concatenate([layer] + pending))
+
+def get_min_presses_by_state(rows, num_buttons):
+    # Each button as the rows it flips in the reduced system, duplicates and
+    # buttons flipping nothing never help
+    buttons = np.array([sum(1 << index for index, row in enumerate(rows) if row >> button & 1) for button in range(num_buttons)], dtype=np.int64)
+    buttons = np.unique(buttons[buttons != 0])
+    target = sum(1 << index for index, row in enumerate(rows) if row >> num_buttons & 1)
+    if target == 0:
+        return 0
+
+    # Meet in the middle: breadth first from no lights and from the target,
+    # always growing the side with the smaller frontier, until the two touch
+    layers = ([np.zeros(1, dtype=np.int64)], [np.array([target], dtype=np.int64)])
+    seen = [layers[0][0], layers[1][0]]
+    while True:
+        side = 0 if len(layers[0][-1]) <= len(layers[1][-1]) else 1
+        layer = expand_layer(layers[side][-1], buttons, seen[side])
+        if len(layer) == 0:
+            raise ValueError("Target state cannot be reached")
+
+        for presses, other in enumerate(layers[1 - side]):
+            if is_member(layer, other).any():
+                return len(layers[side]) + presses
+
+        layers[side].append(layer)
+        seen[side] = np.union1d(seen[side], layer)
+
+def get_search_costs(rank, nullity, num_buttons):
+    # The null space walk looks at every one of the 2^nullity solutions. Breadth
+    # first needs about as many presses as it takes for the subsets of buttons
+    # to outnumber the 2^rank states, and each side only goes half way there
+    reach = [1]
+    while sum(reach) < 1 << rank and len(reach) <= num_buttons:
+        reach.append(math.comb(num_buttons, len(reach)))
+    by_state = 2 * num_buttons * sum(reach[:(len(reach) + 2) // 2])
+    return 1 << nullity, by_state
 
 def solve_factory_one(machine, logger):
     result_lights = convert_lights(machine[0])
     button_seq = convert_buttons(machine[1])
-    dont_care = convert_joltages(machine[2])
 
-    all_seqs = []
-    button_presses = []
+    target = get_bitmask(index for index, light in enumerate(result_lights) if light)
+    button_masks = [get_bitmask(button) for button in button_seq]
 
-    # Generate all possible button sequences for that machine
-    for idx in range(1, len(button_seq) + 1):
-        all_seqs.extend(itertools.combinations(button_seq, idx))
+    rows, pivots = reduce_gf2(button_masks, target, len(result_lights))
+    if rows is None:
+        raise ValueError(f"No button presses light up {machine[0]}")
 
-    # Go monkeys !
-    compute_fn = partial(do_monkey_press, logger=logger, expected=result_lights)
-    with ThreadPoolExecutor() as executor:
-        button_presses = list(executor.map(compute_fn, all_seqs))
+    # Whichever search is cheaper, states are int64 so the breadth first one
+    # only goes up to 62 lights in the reduced system
+    by_solution, by_state = get_search_costs(len(pivots), len(button_masks) - len(pivots), len(button_masks))
+    if by_solution <= by_state or len(pivots) > 62:
+        solution, basis = get_null_space(rows, pivots, len(button_masks))
+        min_presses = get_min_weight(solution, basis, len(button_masks))
+    else:
+        min_presses = get_min_presses_by_state(rows, len(button_masks))
 
-    return min(button_presses)
+    logger.debug("Lights: %s, Buttons: %s, Rank: %s, Min presses: %s", machine[0], len(button_masks), len(pivots), min_presses)
+    return min_presses
 
 def solve_factory_two(factory, logger):
     total_button_presses = 0
@@ -114,7 +205,7 @@ def solve_factory_two(factory, logger):
         num_lights = len(result_lights)
         num_buttons = len(button_seq)
 
-        logger.debug(f"{result_lights} {button_seq} {joltages}")
+        logger.debug("%s %s %s", result_lights, button_seq, joltages)
 
         cost_vector = np.ones(num_buttons)
         targets = np.array(joltages)
@@ -124,7 +215,7 @@ def solve_factory_two(factory, logger):
             for number in button:
                 coeffs[number, index] = 1
 
-        logger.debug(f"Coeefs: {coeffs}\nJoltages: {joltages}")
+        logger.debug("Coeefs: %s\nJoltages: %s", coeffs, joltages)
 
         # Prepare MILP solver
         contraints = LinearConstraint(coeffs, targets, targets)
@@ -137,22 +228,25 @@ def solve_factory_two(factory, logger):
 
         # There's a solution, verify it. Cast to int to avoid rounding issues
         candidate = np.round(result.x).astype(int)
-        logger.debug(f"Candidate solution: {result.x} (raw), {candidate} (converted)")
+        logger.debug("Candidate solution: %s (raw), %s (converted)", result.x, candidate)
 
         if not np.all(coeffs @ candidate == targets):
             raise Exception("No solution è.é")
 
-        logger.debug(f"Min press for this machine: {int(np.sum(candidate))}")
+        logger.debug("Min press for this machine: %s", int(np.sum(candidate)))
         total_button_presses += int(np.sum(candidate))
 
     return total_button_presses
 
 def solve_factory(fn, factory, logger):
     compute_fn = partial(fn, logger=logger)
-    with mp.Pool() as pool:
-        min_button_presses = pool.map(compute_fn, factory)
+    return sum(get_executor().map(compute_fn, factory))
 
-    return sum(presses for presses, _ in min_button_presses)
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_factory(solve_factory_one, read_file(path), logger),
+    2: lambda path, logger: solve_factory_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -162,10 +256,12 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    add_executor_arguments(parser)
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
+    configure_executor_from_args(args)
 
     factory = read_file(args.input_file)
 
@@ -2,33 +2,16 @@
 
 import argparse
 import itertools
+import os
 import sys
 import networkit as nk
 import matplotlib.pyplot as plot
 
-from datetime import datetime
 from functools import lru_cache
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
-
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+from aoc.logger import Logger
 
 def read_file(path):
     result = { "shapes" : [], "regions" : []}
@@ -94,12 +77,17 @@ def solve_tetris_one(tetris, logger):
 
     # Monkey it, but smart
     for region in tetris["regions"]:
-        logger.debug(f"Evaluating region: {region}")
+        logger.debug("Evaluating region: %s", region)
         if evaluate_region(region, tetris["shapes"], logger):
             total += 1
 
     return total
 
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_tetris_one(read_file(path), logger),
+}
+
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
     parser.add_argument("input_file", help="Path to the input file")
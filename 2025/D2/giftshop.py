@@ -1,32 +1,17 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
-import multiprocessing as mp
+import threading
+import time
 
-from datetime import datetime
 from functools import partial
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
-
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+from aoc.executor import add_executor_arguments, configure_executor_from_args, get_executor
+from aoc.logger import Logger
 
 def read_file(path):
     result = []
@@ -67,7 +52,7 @@ def has_sequences_twice_more(id_val):
     return None
 
 def get_invalid_ids_in_range(idrange, sequence_fn, logger):
-    logger.debug(f"Range is : {idrange}")
+    logger.debug("Range is : %s", idrange)
 
     invalid_ids = [ ]
 
@@ -77,22 +62,150 @@ def get_invalid_ids_in_range(idrange, sequence_fn, logger):
     for id_val in range(range_start, range_end + 1):
         if sequence_fn(id_val) is not None:
             invalid_ids.append(id_val)
-            logger.debug(f"Invalid ids list: {invalid_ids}")
+            logger.debug("Invalid id: %s, %s found in range", id_val, len(invalid_ids))
 
     return sum(invalid_ids)
 
-def solve_giftshop(fn, idranges, sequence_fn, logger):
-    compute_fn = partial(fn, logger=logger, sequence_fn=sequence_fn)
-    with mp.Pool() as pool:
-        invalid_ids = pool.map(compute_fn, idranges)
+# Block sizes matching has_sequences_twice for an ID of that many digits
+def get_block_sizes_twice(digits):
+    if digits % 2 != 0:
+        return []
 
-    return sum(invalid_ids)
+    return [digits // 2]
+
+# Block sizes matching has_sequences_twice_more for an ID of that many digits
+def get_block_sizes_twice_more(digits):
+    return [size for size in range(1, digits // 2 + 1) if digits % size == 0]
+
+def sum_repeated_blocks(range_start, range_end, digits, size):
+    # Every ID made of one block repeated is block * 1000..01000..01, so the
+    # invalid IDs in the range are an arithmetic series over the block value
+    multiplier = (10 ** digits - 1) // (10 ** size - 1)
+
+    first_block = max(10 ** (size - 1), -(-range_start // multiplier))
+    last_block = min(10 ** size - 1, range_end // multiplier)
+
+    if first_block > last_block:
+        return 0
+
+    return multiplier * (first_block + last_block) * (last_block - first_block + 1) // 2
+
+def sum_invalid_ids_for_digits(range_start, range_end, digits, block_sizes):
+    # A repeated ID belongs to every block size that is a multiple of its
+    # shortest period, so only count each ID once, under its shortest period
+    periods = sorted({period for size in block_sizes for period in range(1, size + 1) if size % period == 0})
+    shortest_period_sums = {}
 
-def solve_giftshop_one(idranges, logger):
-    return solve_giftshop(get_invalid_ids_in_range, idranges, has_sequences_twice, logger)
+    for period in periods:
+        repeated_sum = sum_repeated_blocks(range_start, range_end, digits, period)
+        for shorter_period, shorter_sum in shortest_period_sums.items():
+            if period % shorter_period == 0:
+                repeated_sum -= shorter_sum
+        shortest_period_sums[period] = repeated_sum
 
-def solve_giftshop_two(idranges, logger):
-    return solve_giftshop(get_invalid_ids_in_range, idranges, has_sequences_twice_more, logger)
+    return sum(shortest_period_sums.values())
+
+def get_invalid_ids_sum_in_range(idrange, block_fn, logger):
+    logger.debug("Range is : %s", idrange)
+
+    range_start = int(idrange.split('-')[0])
+    range_end = int(idrange.split('-')[1])
+
+    total = 0
+
+    for digits in range(len(str(range_start)), len(str(range_end)) + 1):
+        digits_sum = sum_invalid_ids_for_digits(range_start, range_end, digits, block_fn(digits))
+        logger.debug("Sum of invalid ids with %s digits: %s", digits, digits_sum)
+        total += digits_sum
+
+    return total
+
+def get_width(range_start, range_end):
+    return range_end - range_start + 1
+
+def get_digit_lengths(range_start, range_end):
+    return len(str(range_end)) - len(str(range_start)) + 1
+
+def cut_by_width(range_start, range_end, size):
+    while get_width(range_start, range_end) > size:
+        yield range_start, range_start + size - 1
+        range_start += size
+    yield range_start, range_end
+
+def cut_by_digits(range_start, range_end, size):
+    while get_digit_lengths(range_start, range_end) > size:
+        boundary = 10 ** (len(str(range_start)) + size - 1)
+        yield range_start, boundary - 1
+        range_start = boundary
+    yield range_start, range_end
+
+# Per engine: the cost of a range, how to cut it, and the total cost below
+# which a pool takes longer to start than the whole work (about 50 ms)
+ENGINES = {
+    "scan": (get_width, cut_by_width, 50_000),
+    "closed_form": (get_digit_lengths, cut_by_digits, 2_500),
+}
+
+def split_idranges(idranges, parts, engine):
+    cost_fn, cut_fn, _ = ENGINES[engine]
+    bounds = [(int(idrange.split('-')[0]), int(idrange.split('-')[1])) for idrange in idranges]
+    total_cost = sum(cost_fn(range_start, range_end) for range_start, range_end in bounds)
+    target_cost = max(1, -(-total_cost // parts))
+
+    # Only ranges costing more than their share are cut, so that one huge range
+    # is shared between workers instead of pinning a single one
+    sub_ranges = []
+    for range_start, range_end in bounds:
+        for sub_start, sub_end in cut_fn(range_start, range_end, target_cost):
+            sub_ranges.append(f"{sub_start}-{sub_end}")
+
+    return sub_ranges, total_cost
+
+def timed_task(compute_fn, idrange):
+    start = time.perf_counter()
+    result = compute_fn(idrange)
+    return result, f"{os.getpid()}/{threading.get_ident()}", time.perf_counter() - start
+
+def log_worker_utilisation(busy_times, wall_time, logger, utilisation=False):
+    log = logger.info if utilisation else logger.debug
+    for worker, busy_time in sorted(busy_times.items()):
+        log("Worker %s: busy %.3fs of %.3fs (%.1f%%)", worker, busy_time, wall_time, 100 * busy_time / max(wall_time, 1e-9))
+
+def solve_giftshop(fn, idranges, logger, engine, utilisation=False, **kwargs):
+    executor = get_executor()
+    compute_fn = partial(timed_task, partial(fn, logger=logger, **kwargs))
+
+    # Oversplit so that workers finishing early can pick up the remaining pieces
+    sub_ranges, total_cost = split_idranges(idranges, executor.jobs * 4, engine)
+    serial = executor.is_serial(sub_ranges) or total_cost < ENGINES[engine][2]
+    logger.debug(lambda: f"{len(idranges)} ranges split into {len(sub_ranges)} sub-ranges, cost {total_cost}, serial {serial}, chunksize {executor.get_chunksize(sub_ranges)}")
+
+    total = 0
+    busy_times = {}
+    start = time.perf_counter()
+    for invalid_ids, worker, busy_time in executor.imap_unordered(compute_fn, sub_ranges, serial=serial):
+        total += invalid_ids
+        busy_times[worker] = busy_times.get(worker, 0) + busy_time
+
+    log_worker_utilisation(busy_times, time.perf_counter() - start, logger, utilisation)
+
+    return total
+
+def solve_giftshop_one(idranges, logger, scan=False, utilisation=False):
+    if scan:
+        return solve_giftshop(get_invalid_ids_in_range, idranges, logger, "scan", utilisation, sequence_fn=has_sequences_twice)
+    return solve_giftshop(get_invalid_ids_sum_in_range, idranges, logger, "closed_form", utilisation, block_fn=get_block_sizes_twice)
+
+def solve_giftshop_two(idranges, logger, scan=False, utilisation=False):
+    if scan:
+        return solve_giftshop(get_invalid_ids_in_range, idranges, logger, "scan", utilisation, sequence_fn=has_sequences_twice_more)
+    return solve_giftshop(get_invalid_ids_sum_in_range, idranges, logger, "closed_form", utilisation, block_fn=get_block_sizes_twice_more)
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_giftshop_one(read_file(path), logger),
+    2: lambda path, logger: solve_giftshop_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -102,17 +215,29 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    parser.add_argument(
+        "-s", "--scan",
+        action="store_true",
+        help="Check every ID in the ranges instead of summing repeated patterns directly"
+    )
+    parser.add_argument(
+        "-u", "--utilisation",
+        action="store_true",
+        help="Show how busy each worker was"
+    )
+    add_executor_arguments(parser)
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
+    configure_executor_from_args(args)
 
     idranges = read_file(args.input_file)
 
     logger.info(idranges)
 
-    logger.info(f"Sum of invalid ids for round 1 : {solve_giftshop_one(idranges, logger)}")
-    logger.info(f"Sum of invalid ids for round 2 : {solve_giftshop_two(idranges, logger)}")
+    logger.info(f"Sum of invalid ids for round 1 : {solve_giftshop_one(idranges, logger, scan=args.scan, utilisation=args.utilisation)}")
+    logger.info(f"Sum of invalid ids for round 2 : {solve_giftshop_two(idranges, logger, scan=args.scan, utilisation=args.utilisation)}")
 
 if __name__ == "__main__":
     main()
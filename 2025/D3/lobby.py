@@ -1,107 +1,96 @@
 #!/usr/bin/env python3
 
 import argparse
+import numpy as np
+import os
 import sys
-import multiprocessing as mp
 
-from datetime import datetime
 from functools import partial
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
+from aoc.executor import add_executor_arguments, configure_executor_from_args, get_executor
+from aoc.grid import grid_to_digits, load_grid
+from aoc.logger import Logger
+from aoc.shm import SharedRows, split_rows, sum_over_rows
 
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+# Digits that always fit in an int64
+CHUNK_DIGITS = 18
+CHUNK_POWERS = 10 ** np.arange(CHUNK_DIGITS - 1, -1, -1, dtype=np.int64)
 
 def read_file(path):
-    result = []
-    with open(path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            digits = [int(ch) for ch in line]
-            result.append(digits)
-    return result
-
-def get_max_joltage_in_battery(battery, logger):
-    count = 1
-    max_joltage = 0
-    max_tenth = 0
-
-    logger.debug(f"Battery is : {battery}")
-
-    for i in battery:
-        # Do not waste time if the next number for tenth is
-        # less than the previous iteration
-        if i < max_tenth:
-            continue
-        # End is here
-        if count == len(battery):
-            break
-        for j in battery[count:]:
-            current_joltage = i * 10 + j
-            logger.debug(f"{current_joltage} > {max_joltage}")
-            if current_joltage > max_joltage:
-                max_joltage = current_joltage
-                logger.debug(f"max_joltage is now: {max_joltage}")
-
-        count += 1
+    return grid_to_digits(load_grid(path))
+
+def get_number(digits):
+    if len(digits) <= CHUNK_DIGITS:
+        number = 0
+        for digit in digits:
+            number = number * 10 + int(digit)
+        return number
+
+    # 18 digits at a time in int64, then neighbouring chunks merged in pairs so
+    # that the big multiplications stay balanced instead of one digit at a time
+    digits = np.asarray(digits, dtype=np.int64)
+    digits = np.pad(digits, (-len(digits) % CHUNK_DIGITS, 0))
+    numbers = (digits.reshape(-1, CHUNK_DIGITS) @ CHUNK_POWERS).tolist()
+    scale = 10 ** CHUNK_DIGITS
+    while len(numbers) > 1:
+        if len(numbers) % 2:
+            numbers.insert(0, 0)
+        numbers = [high * scale + low for high, low in zip(numbers[0::2], numbers[1::2])]
+        scale *= scale
+    return numbers[0]
+
+def get_max_joltage(battery, k, logger):
+    if len(battery) < k:
+        raise ValueError(f"Array must contain at least {k} integers.")
+
+    # Keep the digits in a decreasing stack, dropping a smaller digit whenever
+    # a bigger one comes after it, as long as k digits can still be picked
+    drops = len(battery) - k
+    selected = []
+
+    for digit in battery:
+        while drops and selected and selected[-1] < digit:
+            selected.pop()
+            drops -= 1
+        selected.append(digit)
+
+    max_joltage = get_number(selected[:k])
+
+    logger.debug("max_joltage is now: %s", max_joltage)
 
     return max_joltage
 
-def get_max_joltage_in_battery_12d(battery, logger):
-    if len(battery) < 12:
-        raise ValueError("Array must contain at least 12 integers.")
-
-    result = []
-    start = 0
-
-    for remaining in range(12, 0, -1):
-        end = len(battery) - remaining
+def solve_lobby(fn, batteries, logger, **kwargs):
+    executor = get_executor()
+    compute_fn = partial(fn, logger=logger, **kwargs)
 
-        max_digit = max(battery[start : end + 1])
+    if executor.is_serial(batteries):
+        return sum(map(compute_fn, batteries))
 
-        for i in range(start, end + 1):
-            if battery[i] == max_digit:
-                result.append(max_digit)
-                start = i + 1
-                break
-
-    max_joltage = int("".join(str(d) for d in result))
-
-    logger.debug(f"max_joltage is now: {max_joltage}")
-
-    return max_joltage
-
-
-def solve_lobby(fn, batteries, logger):
-    compute_fn = partial(fn, logger=logger)
-    with mp.Pool() as pool:
-        joltages = pool.map(compute_fn, batteries)
+    # Workers get the batteries from shared memory and only receive row ranges
+    executor.start()
+    with SharedRows(batteries) as shared_batteries:
+        bounds = split_rows(len(batteries), executor.jobs * 4)
+        joltages = executor.map(partial(sum_over_rows, compute_fn, shared_batteries), bounds, chunksize=1, serial=False)
 
     return sum(joltages)
 
 def solve_lobby_one(batteries, logger):
-    return solve_lobby(get_max_joltage_in_battery, batteries, logger)
+    return solve_lobby(get_max_joltage, batteries, logger, k=2)
 
 def solve_lobby_two(batteries, logger):
-    return solve_lobby(get_max_joltage_in_battery_12d, batteries, logger)
+    return solve_lobby(get_max_joltage, batteries, logger, k=12)
+
+def solve_lobby_k(batteries, k, logger):
+    return solve_lobby(get_max_joltage, batteries, logger, k=k)
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_lobby_one(read_file(path), logger),
+    2: lambda path, logger: solve_lobby_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -111,15 +100,31 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    parser.add_argument(
+        "-k", "--digits",
+        type=int,
+        action="append",
+        default=[],
+        help="Also compute the max joltage with that many digits per battery (can be repeated)"
+    )
+    add_executor_arguments(parser)
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
+    configure_executor_from_args(args)
+
+    # Answers with that many digits are past the default limit for printing ints
+    if args.digits:
+        sys.set_int_max_str_digits(0)
 
     batteries = read_file(args.input_file)
 
     logger.info(f"Max joltage for round 1 : {solve_lobby_one(batteries, logger)}")
     logger.info(f"Max joltage for round 2 : {solve_lobby_two(batteries, logger)}")
 
+    for k in args.digits:
+        logger.info(f"Max joltage for {k} digits : {solve_lobby_k(batteries, k, logger)}")
+
 if __name__ == "__main__":
     main()
@@ -1,50 +1,85 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
 import numpy as np
 
-from datetime import datetime
 from functools import partial
 from scipy.signal import convolve2d
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from aoc.grid import grid_to_bits, grid_to_bool, load_grid
+from aoc.logger import Logger
+
 neighbors = np.array([
     [ True, True, True ],
     [ True, False, True ],
     [ True, True, True ]
 ])
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
-
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
-
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
+def read_file(path):
+    return grid_to_bool(load_grid(path), "@")
+
+def read_file_packed(path):
+    return grid_to_bits(load_grid(path), "@")
+
+def shift_west(words):
+    # Bit c of the result is column c - 1
+    shifted = words << np.uint64(1)
+    shifted[:, 1:] |= words[:, :-1] >> np.uint64(63)
+    return shifted
+
+def shift_east(words):
+    # Bit c of the result is column c + 1
+    shifted = words >> np.uint64(1)
+    shifted[:, :-1] |= words[:, 1:] << np.uint64(63)
+    return shifted
+
+def full_adder(a, b, c):
+    return a ^ b ^ c, (a & b) | (c & (a ^ b))
+
+def get_accessible_packed(rolls, block_rows=4096):
+    rows = rolls.shape[0]
+    empty_row = np.zeros((1, rolls.shape[1]), dtype=rolls.dtype)
+    accessible = np.empty_like(rolls)
+
+    for start in range(0, rows, block_rows):
+        end = min(start + block_rows, rows)
+        above = rolls[start - 1:end - 1] if start > 0 else np.vstack((empty_row, rolls[:end - 1]))
+        below = rolls[start + 1:end + 1] if end < rows else np.vstack((rolls[start + 1:end], empty_row))
+        middle = rolls[start:end]
+
+        # Add the 8 neighbour bits of every cell at once: ones, then twos, then fours
+        ones_a, twos_a = full_adder(shift_west(above), above, shift_east(above))
+        ones_b, twos_b = full_adder(shift_west(below), below, shift_east(below))
+        west, east = shift_west(middle), shift_east(middle)
+        ones_c, twos_c = west ^ east, west & east
+        _, twos_d = full_adder(ones_a, ones_b, ones_c)
+        twos, fours_a = full_adder(twos_a, twos_b, twos_c)
+        fours_b = twos & twos_d
+
+        # Same as the neighbors kernel giving 3 or less: no fours (or eights) bit
+        accessible[start:end] = middle & ~(fours_a | fours_b)
+
+    return accessible
+
+def solve_printing_one_packed(rolls, logger):
+    forklift_operation = get_accessible_packed(rolls)
+    rolls = rolls & ~forklift_operation
+    return rolls, int(np.bitwise_count(forklift_operation).sum())
+
+def solve_printing_two_packed(rolls, logger):
+    current_rolls, total = solve_printing_one_packed(rolls, logger)
 
-    def error(self, msg):
-        self._log("ERROR", msg)
+    removed = total
+    while removed > 0:
+        current_rolls, removed = solve_printing_one_packed(current_rolls, logger)
+        total += removed
+        logger.debug("Roll of paper removed: %s; Total: %s", removed, total)
 
-def read_file(path):
-    result = []
-    with open(path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            roll_line = np.array([c == "@" for c in line])
-            result.append(roll_line)
-    return np.array(result)
+    return current_rolls, total
 
 def solve_printing_one(rolls, logger):
     convolute_neighbor = convolve2d(rolls.astype(int), neighbors, mode="same")
@@ -53,20 +88,40 @@ def solve_printing_one(rolls, logger):
     return rolls, forklift_operation.sum()
 
 def solve_printing_two(rolls, logger):
-    # Do a first pass
-    results = solve_printing_one(rolls, logger)
-    current_rolls = results[0]
-    total = results[1]
+    rows, cols = rolls.shape
+    width = cols + 2
 
-    removed = total
-    while removed > 0:
-        results = solve_printing_one(current_rolls, logger)
-        current_rolls = results[0]
-        removed = results[1]
-        total += removed
-        logger.debug(f"Roll of paper removed: {removed}; Total: {total}")
+    # Pad with an empty border so that every roll has 8 neighbours in the flat grid
+    padded = np.zeros((rows + 2, width), dtype=bool)
+    padded[1:-1, 1:-1] = rolls
+    present = padded.ravel()
 
-    return current_rolls, total
+    # Neighbour counts are computed once, then only updated around removed rolls
+    counts = convolve2d(padded.astype(np.int16), neighbors.astype(np.int16), mode="same").ravel()
+    offsets = np.array([-width - 1, -width, -width + 1, -1, 1, width - 1, width, width + 1])
+
+    wave = np.flatnonzero(present & (counts <= 3))
+    waves = []
+
+    while len(wave) > 0:
+        present[wave] = False
+        waves.append(len(wave))
+        logger.debug(lambda: f"Roll of paper removed: {len(wave)}; Total: {sum(waves)}")
+
+        touched = (wave[:, None] + offsets).ravel()
+        np.subtract.at(counts, touched, 1)
+
+        # Only the neighbours of removed rolls can drop below 4 neighbours
+        touched = np.unique(touched)
+        wave = touched[present[touched] & (counts[touched] <= 3)]
+
+    return padded[1:-1, 1:-1], sum(waves), waves
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_printing_one(read_file(path), logger)[1],
+    2: lambda path, logger: solve_printing_two(read_file(path), logger)[1],
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -76,11 +131,22 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    parser.add_argument(
+        "-p", "--packed",
+        action="store_true",
+        help="Store the grid as 64 cells per word and count neighbours with bitwise operations"
+    )
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
 
+    if args.packed:
+        rolls = read_file_packed(args.input_file)
+        logger.info(f"Num of paper roll for round 1 : {solve_printing_one_packed(rolls, logger)[1]}")
+        logger.info(f"Num of paper roll for round 2 : {solve_printing_two_packed(rolls, logger)[1]}")
+        return
+
     rolls = read_file(args.input_file)
 
     logger.debug(rolls)
@@ -1,42 +1,35 @@
 #!/usr/bin/env python3
 
 import argparse
+import heapq
+import os
 import sys
+import tempfile
 import multiprocessing as mp
+import numpy as np
 
-from datetime import datetime
 from functools import partial
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
+from aoc.logger import Logger
 
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
+# Bytes of text read at a time when sorting the IDs in runs
+READ_BLOCK_SIZE = 1 << 16
 
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+def read_fresh_ranges(f):
+    fresh_ranges = []
+    for line in f:
+        line = line.strip()
+        if not line:
+            break
+        fresh_ranges.append((int(line.split("-")[0]), int(line.split("-")[1])))
+    return fresh_ranges
 
 def read_file(path):
-    fresh_ranges = []
     ingredient_ids = []
     with open(path, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                break
-            fresh_ranges.append((int(line.split("-")[0]), int(line.split("-")[1])))
+        fresh_ranges = read_fresh_ranges(f)
         for line in f:
             line = line.strip()
             if not line:
@@ -44,25 +37,6 @@ def read_file(path):
             ingredient_ids.append(int(line))
     return fresh_ranges, ingredient_ids
 
-def solve_cafeteria_one(ingredient_ids, fresh_ranges, logger):
-    fresh = 0
-
-    for ingredient_id in ingredient_ids:
-        for fresh_range in fresh_ranges:
-            left_bound = fresh_range[0]
-            right_bound = fresh_range[1]
-
-            if ingredient_id > right_bound:
-                logger.debug(f"Ingredient ID {ingredient_id} : skip to next range")
-                continue
-
-            if ingredient_id >= left_bound and ingredient_id <= right_bound:
-                logger.debug(f"Ingredient ID {ingredient_id} is fresh !")
-                fresh +=1
-                break
-
-    return fresh
-
 def merge_ranges(ranges):
     ranges = sorted(ranges, key=lambda x: x[0])
     merged = [ranges[0]]
@@ -77,6 +51,31 @@ def merge_ranges(ranges):
 
     return merged
 
+class IntervalIndex:
+    def __init__(self, ranges):
+        merged = merge_ranges(ranges)
+        self.starts = np.array([start for start, _ in merged], dtype=np.int64)
+        self.ends = np.array([end for _, end in merged], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __contains__(self, ingredient_id):
+        # Last merged range starting at or before the ID
+        position = np.searchsorted(self.starts, ingredient_id, side="right") - 1
+        return bool(position >= 0 and ingredient_id <= self.ends[position])
+
+    def contains(self, ingredient_ids):
+        ingredient_ids = np.asarray(ingredient_ids, dtype=np.int64)
+        positions = np.searchsorted(self.starts, ingredient_ids, side="right") - 1
+        return (positions >= 0) & (ingredient_ids <= self.ends[np.maximum(positions, 0)])
+
+def solve_cafeteria_one(ingredient_ids, fresh_ranges, logger):
+    index = IntervalIndex(fresh_ranges)
+    logger.debug(f"{len(fresh_ranges)} fresh ranges merged into {len(index)}")
+
+    return int(np.count_nonzero(index.contains(ingredient_ids)))
+
 def solve_cafeteria_two(ingredient_ids, fresh_ranges, logger):
     count = 0
 
@@ -84,11 +83,100 @@ def solve_cafeteria_two(ingredient_ids, fresh_ranges, logger):
 
     for fresh_range in new_ranges:
         num = len(range(fresh_range[0], fresh_range[1] + 1))
-        logger.debug(f"There are {num} valid ingredient IDs in range {fresh_range}")
+        logger.debug("There are %s valid ingredient IDs in range %s", num, fresh_range)
         count += num
 
     return count
 
+def write_run(ingredient_ids, directory, runs):
+    ingredient_ids.sort()
+    run_path = os.path.join(directory, f"run_{len(runs)}.bin")
+    ingredient_ids.tofile(run_path)
+    runs.append(run_path)
+
+def write_sorted_runs(f, memory_budget, directory):
+    runs = []
+    ingredient_ids = np.empty(max(1, memory_budget // 8), dtype=np.int64)
+    count = 0
+    carry = b""
+
+    # Fixed size blocks of text parsed straight into one budget of IDs, the
+    # partial last line of each block carried over to the next one
+    while True:
+        block = f.read(READ_BLOCK_SIZE)
+        if block:
+            text, _, carry = (carry + block).rpartition(b"\n")
+        else:
+            text, carry = carry, b""
+
+        values = np.fromstring(text, dtype=np.int64, sep=" ") if text and not text.isspace() else np.zeros(0, dtype=np.int64)
+        while len(values):
+            taken = min(len(values), len(ingredient_ids) - count)
+            ingredient_ids[count:count + taken] = values[:taken]
+            count += taken
+            values = values[taken:]
+            if count == len(ingredient_ids):
+                write_run(ingredient_ids, directory, runs)
+                count = 0
+
+        if not block:
+            break
+
+    if count:
+        write_run(ingredient_ids[:count], directory, runs)
+
+    return runs
+
+def read_run(path, block_size):
+    with open(path, "rb") as f:
+        while True:
+            block = np.fromfile(f, dtype=np.int64, count=block_size)
+            if not len(block):
+                break
+            yield from block.tolist()
+
+def count_fresh_sorted(ingredient_ids, merged_ranges):
+    fresh = 0
+    ranges = iter(merged_ranges)
+    current_range = next(ranges, None)
+
+    # Both sides are sorted, so neither ever has to go back
+    for ingredient_id in ingredient_ids:
+        while current_range is not None and ingredient_id > current_range[1]:
+            current_range = next(ranges, None)
+        if current_range is None:
+            break
+        if ingredient_id >= current_range[0]:
+            fresh += 1
+
+    return fresh
+
+def solve_cafeteria_external(path, memory_budget, logger):
+    with open(path, "rb") as f:
+        fresh_ranges = read_fresh_ranges(line.decode() for line in f)
+
+        with tempfile.TemporaryDirectory() as directory:
+            runs = write_sorted_runs(f, memory_budget, directory)
+            logger.debug(f"Ingredient IDs sorted in {len(runs)} runs")
+
+            # Share the budget between the read buffers of all the runs, each ID
+            # there is a Python int of about 40 bytes with its list slot
+            block_size = max(1, memory_budget // (40 * max(1, len(runs))))
+            ingredient_ids = heapq.merge(*(read_run(run, block_size) for run in runs))
+            fresh = count_fresh_sorted(ingredient_ids, merge_ranges(fresh_ranges))
+
+    return fresh, fresh_ranges
+
+def solve_cafeteria_file(fn, path, logger):
+    fresh_ranges, ingredient_ids = read_file(path)
+    return fn(ingredient_ids, fresh_ranges, logger)
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_cafeteria_file(solve_cafeteria_one, path, logger),
+    2: lambda path, logger: solve_cafeteria_file(solve_cafeteria_two, path, logger),
+}
+
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
     parser.add_argument("input_file", help="Path to the input file")
@@ -97,11 +185,28 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    parser.add_argument(
+        "-e", "--external",
+        action="store_true",
+        help="Sort the ingredient IDs on disk instead of loading them in memory"
+    )
+    parser.add_argument(
+        "-m", "--memory",
+        type=int,
+        default=256,
+        help="Memory budget in MiB for the external sort (default: 256)"
+    )
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
 
+    if args.external:
+        fresh, fresh_ranges = solve_cafeteria_external(args.input_file, args.memory * 1024 * 1024, logger)
+        logger.info(f"Total of fresh ingredient IDs for round 1 : {fresh}")
+        logger.info(f"Total of fresh ingredient IDs for round 2 : {solve_cafeteria_two([], fresh_ranges, logger)}")
+        return
+
     fresh_ranges, ingredient_ids = read_file(args.input_file)
 
     logger.debug(fresh_ranges)
@@ -1,112 +1,175 @@
 #!/usr/bin/env python3
 
 import argparse
+import math
+import os
 import sys
-import multiprocessing as mp
+import numpy as np
 
-from datetime import datetime
 from functools import partial
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
+from aoc.executor import add_executor_arguments, configure_executor_from_args, get_executor
+from aoc.grid import load_padded_grid
+from aoc.logger import Logger
+from aoc.shm import SharedRows, split_rows
 
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
+SPACE = ord(" ")
 
-    def info(self, msg):
-        self._log("INFO", msg)
+# Operator code: ufunc reducing the operands, sign of the result, exact fallback
+REDUCTIONS = {
+    ord("+"): (np.add, 1, sum),
+    ord("*"): (np.multiply, 1, math.prod),
+    ord("-"): (np.add, -1, sum),
+}
 
-    def warning(self, msg):
-        self._log("WARNING", msg)
+IDENTITIES = np.zeros(256, dtype=np.int64)
+for code, (ufunc, _, _) in REDUCTIONS.items():
+    IDENTITIES[code] = ufunc.identity
 
-    def error(self, msg):
-        self._log("ERROR", msg)
+POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+
+# Longest number that always fits in an int64
+MAX_DIGITS = 18
+
+# Well below 2**63 so that float rounding cannot hide an overflow
+INT64_SAFE = 2.0 ** 62
+
+# Fewer problems than this are faster to reduce than to hand out to workers
+PARALLEL_PROBLEMS = 1 << 18
 
 def read_file(path):
-    result = []
-    with open(path, "r") as f:
-        for line in f:
-            line = list(filter(None, line.strip().split(" ")))
-            if not line:
-                continue
-            result.append(line)
-    result = list(map(list, zip(*result)))
-    return result
-
-def compute_problems_one(operation, logger):
-    math_op = operation[-1]
-    accumulator = 0
-
-    for integer in operation[:len(operation) -1]:
-        value = int(integer)
-        logger.debug(f"Operation: {math_op}, Value: {value}, Accumulator: {accumulator}")
-        if math_op == "+":
-            accumulator += value
-        if math_op == "*":
-            if accumulator == 0:
-                accumulator = 1
-            accumulator *= value
-        if math_op == "-":
-            accumulator -= value
-
-    return accumulator
-
-def compute_problems_two(operation, logger):
-    math_op = operation[-1]
-    accumulator = 0
-
-    operation = operation[:len(operation) -1]
-    max_len = max(len(x) for x in operation)
-    operation = [x.rjust(max_len) for x in operation]
-
-    result = []
-
-    print(operation)
-
-    # Process each column from right to left
-    for col in range(max_len - 1, -1, -1):
-        digits = []
-        for row in operation:
-            if row[col] == ' ':
-                continue
-            else:
-                digits.append(row[col])
-        result.append(int("".join(digits)))
-
-    print(result)
-
-    for integer in result:
-        value = int(integer)
-        logger.debug(f"Operation: {math_op}, Value: {value}, Accumulator: {accumulator}")
-        if math_op == "+":
-            accumulator += value
-        if math_op == "*":
-            if accumulator == 0:
-                accumulator = 1
-            accumulator *= value
-        if math_op == "-":
-            accumulator -= value
-
-    return accumulator
-
-def solve_trash(fn, ops, logger):
-    compute_fn = partial(fn, logger=logger)
-    with mp.Pool() as pool:
-        problems = pool.map(compute_fn, ops)
-
-    return sum(problems)
-
-def solve_trash_one(ops, logger):
-    return solve_trash(compute_problems_one, ops, logger)
-
-def solve_trash_two(ops, logger):
-    return solve_trash(compute_problems_two, ops, logger)
+    return load_padded_grid(path)
+
+def get_problem_bounds(grid):
+    # Problems are separated by columns that are blank on every line
+    used = np.concatenate(([False], np.any(grid != SPACE, axis=0), [False]))
+    edges = np.flatnonzero(np.diff(used.astype(np.int8)))
+    return edges[0::2], edges[1::2]
+
+def get_operators(grid, starts):
+    operators = np.where(grid[-1] == SPACE, 0, grid[-1])
+    return np.maximum.reduceat(operators, starts)
+
+def get_digit_values(digits, is_digit, place_values):
+    # Each digit is worth 10 to the number of digits after it in the same number
+    powers = POWERS_OF_TEN.take(place_values, mode="clip")
+    return np.where(is_digit, digits * powers, 0)
+
+def get_exact_operands(lines):
+    # Numbers too long for int64 are read back from the grid as Python integers
+    operands = (line.tobytes().replace(b" ", b"") for line in lines)
+    return [int(operand) for operand in operands if operand]
+
+def get_problem_matrix(operators, operands, is_operand):
+    # One row per problem: the operator code, then its operands padded with
+    # the identity of the operator so that whole rows can be reduced
+    identities = IDENTITIES[operators]
+    return np.column_stack((operators, np.where(is_operand, operands, identities[:, None]))).astype(np.int64)
+
+def get_problems_one(grid):
+    starts, ends = get_problem_bounds(grid)
+    digits = grid[:-1].astype(np.int64) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    # Numbers are read along the lines, digits after a column counted up to the end of its problem
+    after = np.zeros((len(digits), grid.shape[1] + 1), dtype=np.int64)
+    after[:, :-1] = np.cumsum(is_digit[:, ::-1], axis=1)[:, ::-1]
+    problem_ends = np.repeat(ends, np.diff(ends, prepend=0))
+    problem_ends = np.pad(problem_ends, (0, grid.shape[1] - len(problem_ends)), mode="edge")
+    place_values = after[:, :-1] - after[:, problem_ends] - 1
+
+    numbers = np.add.reduceat(get_digit_values(digits, is_digit, place_values), starts, axis=1).T
+    lengths = np.add.reduceat(is_digit, starts, axis=1).T
+    operators = get_operators(grid, starts)
+
+    too_long = np.any(lengths > MAX_DIGITS, axis=1)
+    exact_problems = [(operators[index], get_exact_operands(grid[:-1, starts[index]:ends[index]])) for index in np.flatnonzero(too_long)]
+    return get_problem_matrix(operators[~too_long], numbers[~too_long], lengths[~too_long] > 0), exact_problems
+
+def get_problems_two(grid):
+    starts, ends = get_problem_bounds(grid)
+    digits = grid[:-1].astype(np.int64) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+
+    # Numbers are read down the columns, then the columns from right to left
+    place_values = np.cumsum(is_digit[::-1], axis=0)[::-1] - is_digit
+    numbers = get_digit_values(digits, is_digit, place_values).sum(axis=0)
+    lengths = is_digit.sum(axis=0)
+    has_number = lengths > 0
+
+    columns = ends[:, None] - 1 - np.arange(int((ends - starts).max()))
+    in_problem = columns >= starts[:, None]
+    columns = np.where(in_problem, columns, 0)
+
+    operators = get_operators(grid, starts)
+
+    too_long = np.maximum.reduceat(lengths, starts) > MAX_DIGITS
+    exact_problems = [(operators[index], get_exact_operands(grid[:-1, starts[index]:ends[index]].T[::-1])) for index in np.flatnonzero(too_long)]
+    return get_problem_matrix(operators[~too_long], numbers[columns[~too_long]], (in_problem & has_number[columns])[~too_long]), exact_problems
+
+def compute_problems(problems, logger):
+    operators = problems[:, 0]
+    operands = problems[:, 1:]
+    totals = []
+
+    for code, (ufunc, sign, exact_fn) in REDUCTIONS.items():
+        selected = operands[operators == code]
+        if not len(selected):
+            continue
+
+        # Anything a float estimate puts near the int64 limit is redone with Python integers
+        overflows = np.abs(ufunc.reduce(selected.astype(np.float64), axis=1)) >= INT64_SAFE
+        values = ufunc.reduce(selected[~overflows], axis=1)
+        logger.debug("Operation: %s, Problems: %s, Overflowing: %s", chr(code), len(selected), np.count_nonzero(overflows))
+
+        if np.abs(values.astype(np.float64)).sum() < INT64_SAFE:
+            totals.append(sign * int(values.sum()))
+        else:
+            totals.append(sign * sum(values.tolist()))
+        totals.extend(sign * exact_fn(row) for row in selected[overflows].tolist())
+
+    return sum(totals)
+
+def compute_exact_problems(exact_problems, logger):
+    total = 0
+    for code, operands in exact_problems:
+        if code in REDUCTIONS:
+            _, sign, exact_fn = REDUCTIONS[code]
+            total += sign * exact_fn(operands)
+    logger.debug("Problems with numbers over %s digits: %s", MAX_DIGITS, len(exact_problems))
+    return total
+
+def compute_problem_block(problems, bounds, logger):
+    return compute_problems(problems.block(*bounds).reshape(bounds[1] - bounds[0], -1), logger)
+
+def solve_trash(problems, exact_problems, logger):
+    executor = get_executor()
+    exact_total = compute_exact_problems(exact_problems, logger)
+
+    if executor.is_serial(problems) or len(problems) < PARALLEL_PROBLEMS:
+        return exact_total + compute_problems(problems, logger)
+
+    # Workers get the problems from shared memory and only receive index ranges
+    executor.start()
+    with SharedRows(problems, dtype=np.int64) as shared_problems:
+        bounds = split_rows(len(problems), executor.jobs)
+        totals = executor.map(partial(compute_problem_block, shared_problems, logger=logger), bounds, chunksize=1, serial=False)
+
+    return exact_total + sum(totals)
+
+def solve_trash_one(grid, logger):
+    return solve_trash(*get_problems_one(grid), logger)
+
+def solve_trash_two(grid, logger):
+    return solve_trash(*get_problems_two(grid), logger)
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_trash_one(read_file(path), logger),
+    2: lambda path, logger: solve_trash_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -116,17 +179,17 @@ def main():
         action="store_true",
         help="Enable debug output"
     )
+    add_executor_arguments(parser)
 
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
+    configure_executor_from_args(args)
 
-    ops = read_file(args.input_file)
-
-    logger.debug(ops)
+    grid = read_file(args.input_file)
 
-    logger.info(f"Total of problems for round 1 : {solve_trash_one(ops, logger)}")
-    logger.info(f"Total of problems for round 2 : {solve_trash_two(ops, logger)}")
+    logger.info(f"Total of problems for round 1 : {solve_trash_one(grid, logger)}")
+    logger.info(f"Total of problems for round 2 : {solve_trash_two(grid, logger)}")
 
 if __name__ == "__main__":
     main()
@@ -1,105 +1,89 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
-import multiprocessing as mp
+import numpy as np
 
-from collections import Counter
-from datetime import datetime
-from functools import partial
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+from aoc.grid import load_grid
+from aoc.logger import Logger
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
+SOURCE = ord("S")
+SPLITTER = ord("^")
+EMPTY = ord(".")
+BEAM = ord("|")
 
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+# Beam counts are promoted to Python integers before an add could overflow int64
+INT64_MAX = np.iinfo(np.int64).max
 
 def read_file(path):
-    result = []
-    with open(path, "r") as f:
+    return load_grid(path)
+
+def stream_file(path):
+    # One row at a time, the manifold is never held in memory
+    width = None
+    with open(path, "rb") as f:
         for line in f:
-            line = line.strip()
+            line = line.rstrip(b"\r\n")
             if not line:
                 continue
-            result.append(line)
-    return result
+            if width is None:
+                width = len(line)
+            elif len(line) != width:
+                raise ValueError(f"{path} is not a rectangular grid of {width} columns")
+            yield np.frombuffer(line, dtype=np.uint8)
+
+def trace_beams(trace, manifold_line, beams):
+    traced_line = manifold_line.copy()
+    traced_line[(beams != 0) & (manifold_line == EMPTY)] = BEAM
+    trace.write(traced_line.tobytes())
+    trace.write(b"\n")
+
+def propagate_beams(manifold, logger, trace=None):
+    beams = None
+    total_splits = 0
 
-def manifold_print(manifold):
-    for line in manifold:
-        print(line)
+    for manifold_line in manifold:
+        if beams is None:
+            beams = np.zeros(len(manifold_line), dtype=np.int64)
+        beams[manifold_line == SOURCE] += 1
 
-def solve_tachyon_one(manifold, logger):
-    source_line = manifold[0]
-    source_pos = source_line.find('S')
-    total_splits = 0
-    beams = set()
-    new_beams = set()
-    output_manifold = manifold
-
-    # Split all beams
-    for line in range(1, len(manifold)):
-        manifold_line = list(manifold[line])
-
-        # If no new beams, just propagate from source
-        if not new_beams:
-            manifold_line[source_pos] = "|"
-            output_manifold[line] = "".join(manifold_line)
-            new_beams.add(source_pos)
-            continue
-
-        beams = new_beams.copy()
-
-        for beam in beams:
-            # Splitter !
-            if manifold_line[beam] == "^":
-                manifold_line[beam - 1] = "|"
-                manifold_line[beam + 1] = "|"
-                output_manifold[line] = "".join(manifold_line)
-                new_beams.remove(beam)
-                new_beams.add(beam - 1)
-                new_beams.add(beam + 1)
-                total_splits += 1
-                continue
+        # Every splitter reached by a beam sends all of its timelines left and right
+        split = np.where(manifold_line == SPLITTER, beams, 0)
+        total_splits += int(np.count_nonzero(split))
+
+        # A column can gain both of its neighbours' splits, the next source one more
+        if beams.dtype != object and int(beams.max()) + 2 * int(split.max()) >= INT64_MAX:
+            logger.debug("Beam counts could pass %s, switching to Python integers", INT64_MAX)
+            beams = beams.astype(object)
+            split = split.astype(object)
 
-            # No splitter, just repeat
-            manifold_line[beam] = "|"
-            output_manifold[line] = "".join(manifold_line)
+        beams -= split
+        beams[:-1] += split[1:]
+        beams[1:] += split[:-1]
 
-        logger.debug(f"Beam list : {beams}")
+        logger.debug(lambda: f"Beam list : {np.flatnonzero(beams).tolist()}")
 
-    manifold_print(output_manifold)
+        if trace is not None:
+            trace_beams(trace, manifold_line, beams)
 
-    return output_manifold, total_splits
+    if beams is None:
+        return 0, 0
+    return total_splits, sum(beams.tolist())
+
+def solve_tachyon_one(manifold, logger):
+    return propagate_beams(manifold, logger)[0]
 
 def solve_tachyon_two(manifold, logger):
-    possible_paths = Counter()
-    for manifold_line in manifold:
-        for index in range (0, len(manifold_line)):
-            char = list(manifold_line)[index]
-            if char == 'S':
-                possible_paths[index] = 1
-            if char == '^':
-                if index in possible_paths:
-                    possible_paths[index-1] += possible_paths[index]
-                    possible_paths[index+1] += possible_paths[index]
-                    del possible_paths[index]
-
-    return possible_paths.total()
+    return propagate_beams(manifold, logger)[1]
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_tachyon_one(read_file(path), logger),
+    2: lambda path, logger: solve_tachyon_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -110,16 +94,30 @@ def main():
         help="Enable debug output"
     )
 
+    parser.add_argument(
+        "-s", "--stream",
+        action="store_true",
+        help="Solve both rounds in a single pass over the file without loading it"
+    )
+    parser.add_argument(
+        "-t", "--trace",
+        help="Write the manifold with its beams drawn to this file"
+    )
+
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
 
-    manifold = read_file(args.input_file)
+    manifold = stream_file(args.input_file) if args.stream else read_file(args.input_file)
 
-    logger.debug(manifold)
+    if args.trace:
+        with open(args.trace, "wb") as trace:
+            total_splits, total_timelines = propagate_beams(manifold, logger, trace)
+    else:
+        total_splits, total_timelines = propagate_beams(manifold, logger)
 
-    logger.info(f"Total of beams for round 1 : {solve_tachyon_one(manifold, logger)[1]}")
-    logger.info(f"Total of beams for round 2 : {solve_tachyon_two(manifold, logger)}")
+    logger.info(f"Total of beams for round 1 : {total_splits}")
+    logger.info(f"Total of beams for round 2 : {total_timelines}")
 
 if __name__ == "__main__":
     main()
@@ -1,49 +1,164 @@
 #!/usr/bin/env python3
 
 import argparse
+import heapq
+import itertools
+import math
+import os
 import sys
-import multiprocessing as mp
+import numpy as np
 
-from collections import Counter
-from datetime import datetime
 from functools import partial
+from scipy.spatial import KDTree
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
+from aoc.disjoint_set import DisjointSet
+from aoc.logger import Logger
 
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
+# The puzzle connects the 1000 closest pairs, only 10 in the 20 box example
+CONNECTIONS = 1000
+DEMO_CONNECTIONS = 10
 
-    def info(self, msg):
-        self._log("INFO", msg)
+# Neighbours first fetched for every box, doubled whenever a box runs out
+NEIGHBOURS = 32
 
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+# Heap entry asking for more neighbours of a box instead of a pair
+REFILL = -1
 
 def read_file(path):
     result = []
     with open(path, "r") as f:
         for line in f:
-            box = [int(coordinate) for coordinate in line.strip().split(",")]
+            line = line.strip()
             if not line:
                 continue
-            result.append(box)
-    return result
-
-def solve_junctionboxes_one(junctionbox_map, logger):
-    return 0
+            result.append([int(coordinate) for coordinate in line.split(",")])
+    return np.array(result, dtype=np.int64).reshape(-1, 3)
+
+def get_connections(junctionbox_map):
+    return CONNECTIONS if len(junctionbox_map) >= CONNECTIONS else DEMO_CONNECTIONS
+
+def get_neighbours(junctionbox_map, boxes, indices):
+    count = indices.shape[1]
+
+    # Squared distances are exact in int64, the tree only gives floats
+    distances = ((junctionbox_map[indices] - junctionbox_map[boxes][:, None]) ** 2).sum(axis=2)
+    order = np.lexsort((indices, distances), axis=1)
+    distances = np.take_along_axis(distances, order, axis=1)
+    indices = np.take_along_axis(indices, order, axis=1)
+
+    # Boxes as far as the furthest one fetched may have been left out, so only
+    # the neighbours closer than that are known to be complete
+    limits = [math.inf] * len(boxes) if count == len(junctionbox_map) else distances[:, -1].tolist()
+
+    # A pair belongs to its lowest box only, every box gets a view on the kept ones
+    kept = indices > boxes[:, None]
+    splits = np.cumsum(np.count_nonzero(kept, axis=1))[:-1]
+    distances = np.split(distances[kept], splits)
+    indices = np.split(indices[kept], splits)
+    return [[box_distances, box_indices, limit, 0, count] for box_distances, box_indices, limit in zip(distances, indices, limits)]
+
+def refill_neighbours(tree, junctionbox_map, neighbours, box):
+    distances, indices, _, position, count = neighbours[box]
+
+    # Fetch twice as many, then skip what was already handed out
+    count = min(2 * count, len(junctionbox_map))
+    _, nearest = tree.query(junctionbox_map[box], k=count)
+    state = neighbours[box] = get_neighbours(junctionbox_map, np.array([box]), np.reshape(nearest, (1, count)))[0]
+    if position:
+        # Sorted by distance then index, so the last pair handed out is found by searching both
+        last_distance, last_index = distances[position - 1], indices[position - 1]
+        low = np.searchsorted(state[0], last_distance, side="left")
+        high = np.searchsorted(state[0], last_distance, side="right")
+        state[3] = int(low + np.searchsorted(state[1][low:high], last_index, side="right"))
+
+def get_next_neighbour(neighbours, box):
+    distances, indices, limit, position, _ = neighbours[box]
+    if position < len(distances) and distances[position] < limit:
+        return int(distances[position]), box, int(indices[position])
+    if limit == math.inf:
+        return None
+    # Nothing more is known below the limit, fetch more once the heap gets there
+    return limit, box, REFILL
+
+def get_closest_pairs(junctionbox_map, logger, count=NEIGHBOURS, block_size=1 << 12):
+    if len(junctionbox_map) < 2:
+        return
+
+    tree = KDTree(junctionbox_map)
+    count = min(count + 1, len(junctionbox_map))
+
+    # Every box walks its own neighbours by distance, the heap merges the walks.
+    # They are fetched a block of boxes at a time to keep the temporaries small
+    neighbours = []
+    for start in range(0, len(junctionbox_map), block_size):
+        boxes = np.arange(start, min(start + block_size, len(junctionbox_map)))
+        _, nearest = tree.query(junctionbox_map[boxes], k=count)
+        neighbours.extend(get_neighbours(junctionbox_map, boxes, nearest.reshape(-1, count)))
+    heap = [entry for entry in map(partial(get_next_neighbour, neighbours), range(len(junctionbox_map))) if entry is not None]
+    heapq.heapify(heap)
+
+    while heap:
+        distance, box, other = heap[0]
+        if other == REFILL:
+            refill_neighbours(tree, junctionbox_map, neighbours, box)
+        else:
+            neighbours[box][3] += 1
+
+        entry = get_next_neighbour(neighbours, box)
+        if entry is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, entry)
+
+        if other != REFILL:
+            logger.debug("Pair: %s, %s, Distance: %s", box, other, distance)
+            yield box, other
+
+def get_pair_batch(pairs, count):
+    batch = np.fromiter(itertools.chain.from_iterable(itertools.islice(pairs, count)), dtype=np.int64)
+    return batch.reshape(-1, 2)
+
+def solve_junctionboxes(junctionbox_map, logger, connections=None, until_connected=True, batch_size=1 << 12):
+    if connections is None:
+        connections = get_connections(junctionbox_map)
+
+    circuits = DisjointSet(len(junctionbox_map))
+    pairs = get_closest_pairs(junctionbox_map, logger)
+    last_product = 0
+
+    # Kruskal: pairs by increasing distance, joined when in different circuits
+    batch = get_pair_batch(pairs, connections)
+    merged = circuits.union_pairs(batch[:, 0], batch[:, 1])
+    largest_product = math.prod(circuits.largest(3))
+    logger.debug("Pairs: %s, Circuits: %s", len(batch), circuits.components)
+
+    while until_connected and circuits.components > 1:
+        batch = get_pair_batch(pairs, batch_size)
+        if not len(batch):
+            break
+        merged = circuits.union_pairs(batch[:, 0], batch[:, 1])
+        logger.debug("Pairs: %s, Circuits: %s", len(batch), circuits.components)
+
+    if until_connected and circuits.components == 1 and np.any(merged):
+        # Nothing can merge after the pair that left a single circuit
+        box, other = batch[np.flatnonzero(merged)[-1]]
+        last_product = int(junctionbox_map[box][0] * junctionbox_map[other][0])
+
+    return largest_product, last_product
+
+def solve_junctionboxes_one(junctionbox_map, logger, connections=None):
+    return solve_junctionboxes(junctionbox_map, logger, connections, until_connected=False)[0]
 
 def solve_junctionboxes_two(junctionbox_map, logger):
-    return 0
+    return solve_junctionboxes(junctionbox_map, logger)[1]
+
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_junctionboxes_one(read_file(path), logger),
+    2: lambda path, logger: solve_junctionboxes_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -54,16 +169,22 @@ def main():
         help="Enable debug output"
     )
 
+    parser.add_argument(
+        "-c", "--connections",
+        type=int,
+        help=f"Connections made before round 1 is counted (default: {CONNECTIONS}, {DEMO_CONNECTIONS} for the example)"
+    )
+
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
 
     junctionbox_map = read_file(args.input_file)
 
-    logger.debug(junctionbox_map)
+    largest_product, last_product = solve_junctionboxes(junctionbox_map, logger, args.connections)
 
-    logger.info(f"Size of circuits for round 1 : {solve_junctionboxes_one(junctionbox_map, logger)}")
-    logger.info(f"Size of circuits for round 2 : {solve_junctionboxes_two(junctionbox_map, logger)}")
+    logger.info(f"Size of circuits for round 1 : {largest_product}")
+    logger.info(f"Size of circuits for round 2 : {last_product}")
 
 if __name__ == "__main__":
     main()
@@ -1,242 +1,180 @@
 #!/usr/bin/env python3
 
 import argparse
+import os
 import sys
 import numpy as np
 
-from collections import defaultdict
-from datetime import datetime
+from functools import partial
+from scipy import ndimage
 
-class Logger:
-    def __init__(self, debug=False):
-        self.debug_enabled = debug
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
 
-    def _log(self, level, msg):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        sys.stderr.write(f"[{timestamp}] [{level}] {msg}\n")
+from aoc.image import write_image
+from aoc.logger import Logger
 
-    def debug(self, msg):
-        if self.debug_enabled:
-            self._log("DEBUG", msg)
-
-    def info(self, msg):
-        self._log("INFO", msg)
-
-    def warning(self, msg):
-        self._log("WARNING", msg)
-
-    def error(self, msg):
-        self._log("ERROR", msg)
+# Colours of the rendered tile map
+BACKGROUND, INSIDE, LOOP, RECTANGLE_ONE, RECTANGLE_TWO = range(5)
+PALETTE = [(255, 255, 255), (200, 235, 200), (200, 40, 40), (40, 80, 220), (240, 150, 0)]
+RENDER_SIZE = 1024
 
 def read_file(path):
     result = []
-    max_row = 0
-    max_col = 0
     with open(path, "r") as f:
         for line in f:
-            coordinates = tuple(line.strip().split(","))
-            max_row = max(int(coordinates[0]), max_row)
-            max_col = max(int(coordinates[1]), max_col)
+            line = line.strip()
             if not line:
                 continue
-            result.append(coordinates)
-    return result, max_row, max_col
-
-def print_square(one, two, three, four):
-    one_x = one[0]
-    one_y = one[1]
-    two_x = two[0]
-    two_y = two[1]
-    three_x  = three[0]
-    three_y = three[1]
-    four_x = four[0]
-    four_y = four[1]
-
-    size_x = max(one_x, two_x, three_x, four_x) + 2
-    size_y = max(one_y, two_y, three_y, four_y) + 2
-
-    grid = np.full((size_y, size_x), ".")
-
-    grid[one_y][one_x] = "1"
-    grid[two_y][two_x] = "2"
-    grid[three_y][three_x] = "3"
-    grid[four_y][four_x] = "4"
-
-    print(grid)
-    print()
-
-def print_updated_tile_map(grid, one, two, three, four):
-    one_x = one[0]
-    one_y = one[1]
-    two_x = two[0]
-    two_y = two[1]
-    three_x  = three[0]
-    three_y = three[1]
-    four_x = four[0]
-    four_y = four[1]
-
-    grid[one_y][one_x] = "1"
-    grid[two_y][two_x] = "2"
-    grid[three_y][three_x] = "3"
-    grid[four_y][four_x] = "4"
-
-    print(grid)
-    print()
-
-def print_tile_map(tile_map):
-    tiles = tile_map[0]
-    rows = tile_map[1] + 2
-    cols = tile_map[2] + 2
-
-    grid = np.full((cols, rows), ".")
-
-    for tile in tiles:
-        row = int(tile[0])
-        col = int(tile[1])
-        tile = tile[2]
-
-        if tile == "red":
-            grid[col][row] = "#"
-        if tile == "green":
-            grid[col][row] = "X"
-
-    return grid
-
-def solve_rectangle_one(tile_map, logger):
+            result.append([int(coordinate) for coordinate in line.split(",")])
+    red_tiles = np.array(result, dtype=np.int64).reshape(-1, 2)
+    max_row, max_col = red_tiles.max(axis=0).tolist() if len(red_tiles) else (0, 0)
+    return red_tiles, max_row, max_col
+
+def get_corner_tiles(red_tiles, row_sign, col_sign):
+    # Tiles that no other tile beats towards one corner, both in row and column
+    tiles = red_tiles * (row_sign, col_sign)
+    order = np.lexsort((tiles[:, 1], tiles[:, 0]))
+    cols = tiles[order, 1]
+    previous_min = np.concatenate(([np.iinfo(np.int64).max], np.minimum.accumulate(cols)[:-1]))
+    return order[cols < previous_min]
+
+def get_max_area(first, second, block_size, fits=None):
+    max_area, corners = 0, None
+
+    # Areas of a block of pairs at a time, only the best one is kept
+    for start in range(0, len(first), block_size):
+        rows = first[start:start + block_size]
+        for other_start in range(0, len(second), block_size):
+            other_rows = second[other_start:other_start + block_size]
+            areas = (np.abs(rows[:, None, 0] - other_rows[None, :, 0]) + 1) * (np.abs(rows[:, None, 1] - other_rows[None, :, 1]) + 1)
+            if fits is not None:
+                areas = np.where(fits(rows, other_rows), areas, 0)
+            index = int(np.argmax(areas))
+            if areas.flat[index] > max_area:
+                tile, other_tile = divmod(index, len(other_rows))
+                max_area = int(areas.flat[index])
+                corners = (rows[tile, :2].tolist(), other_rows[other_tile, :2].tolist())
+
+    return max_area, corners
+
+def get_largest_rectangle_one(tile_map, logger, block_size=1 << 9):
     red_tiles = tile_map[0]
-    max_row = tile_map[1]
-    max_col = tile_map[2]
-
-    rectangle_areas = []
-
-    # Find biggest rectangles
-    for (index, tile) in enumerate(red_tiles):
-        row = int(tile[0])
-        col = int(tile[1])
-
-        for next_tile in red_tiles[index:]:
-            next_row = int(next_tile[0])
-            next_col = int(next_tile[1])
-
-            if row == next_row and col == next_col:
-                continue
-
-            area = max(abs(col - next_col + 1), 1) * max(abs(row - next_row + 1), 1)
-            logger.debug(f"Corner 1: {row},{col}; Corner 2: {next_row},{next_col}; Area: {area}")
-            rectangle_areas.append(area)
-
-    return max(rectangle_areas)
-
-def solve_rectangle_two(tile_map, logger):
+    max_area, corners = 0, None
+
+    # A rectangle only grows when a corner moves away from the other one, so
+    # the largest pairs a tile nothing beats towards one corner with a tile
+    # nothing beats towards the opposite one
+    for row_sign, col_sign in ((1, 1), (1, -1)):
+        first = red_tiles[get_corner_tiles(red_tiles, row_sign, col_sign)]
+        second = red_tiles[get_corner_tiles(red_tiles, -row_sign, -col_sign)]
+        logger.debug("Corner tiles: %s and %s", len(first), len(second))
+
+        area, area_corners = get_max_area(first, second, block_size)
+        if area > max_area:
+            max_area, corners = area, area_corners
+
+    logger.debug("Corner 1: %s; Corner 2: %s; Area: %s", *(corners or (None, None)), max_area)
+    return max_area, corners
+
+def compress_coordinates(coordinates):
+    # Every distinct coordinate gets a cell, and so does every gap between two
+    # of them, which stands for that many tiles (maybe none)
+    values, ranks = np.unique(coordinates, return_inverse=True)
+    sizes = np.ones(2 * len(values) - 1, dtype=np.int64)
+    sizes[1::2] = np.diff(values) - 1
+    return 2 * ranks, sizes
+
+def get_outside_prefix_sum(cells, row_sizes, col_sizes):
+    boundary = np.zeros((len(row_sizes), len(col_sizes)), dtype=bool)
+
+    # The red tiles are the corners of the loop, in order, joined by straight lines
+    for (row, col), (next_row, next_col) in zip(cells.tolist(), np.roll(cells, -1, axis=0).tolist()):
+        if row != next_row and col != next_col:
+            raise ValueError(f"Red tiles {row},{col} and {next_row},{next_col} are not on a line")
+        boundary[min(row, next_row):max(row, next_row) + 1, min(col, next_col):max(col, next_col) + 1] = True
+
+    # Cells not reached from outside the loop are inside, only the outside
+    # cells that hold at least one tile count against a rectangle
+    outside = ~ndimage.binary_fill_holes(boundary)
+    outside &= (row_sizes[:, None] > 0) & (col_sizes[None, :] > 0)
+
+    # Counts of cells, not tiles, so int32 holds them on any grid that fits in memory
+    dtype = np.int32 if outside.size < np.iinfo(np.int32).max else np.int64
+    prefix_sum = np.zeros((len(row_sizes) + 1, len(col_sizes) + 1), dtype=dtype)
+    prefix_sum[1:, 1:] = outside.cumsum(axis=0, dtype=dtype).cumsum(axis=1, dtype=dtype)
+    return prefix_sum
+
+def fits_inside(prefix_sum, rows, other_rows):
+    # Columns 2 and 3 are the compressed row and column of each tile
+    top = np.minimum(rows[:, None, 2], other_rows[None, :, 2])
+    bottom = np.maximum(rows[:, None, 2], other_rows[None, :, 2]) + 1
+    left = np.minimum(rows[:, None, 3], other_rows[None, :, 3])
+    right = np.maximum(rows[:, None, 3], other_rows[None, :, 3]) + 1
+    outside = prefix_sum[bottom, right] - prefix_sum[top, right] - prefix_sum[bottom, left] + prefix_sum[top, left]
+    return outside == 0
+
+def get_largest_rectangle_two(tile_map, logger, block_size=1 << 9):
     red_tiles = tile_map[0]
-    max_row = tile_map[1]
-    max_col = tile_map[2]
+    if not len(red_tiles):
+        return 0, None
 
-    rectangle_areas = []
+    rows, row_sizes = compress_coordinates(red_tiles[:, 0])
+    cols, col_sizes = compress_coordinates(red_tiles[:, 1])
+    prefix_sum = get_outside_prefix_sum(np.column_stack((rows, cols)), row_sizes, col_sizes)
+    logger.debug("Compressed grid: %s x %s", len(row_sizes), len(col_sizes))
 
-    all_tiles = set()
+    # Any pair of red tiles can be corners, as long as no outside tile lies between them
+    tiles = np.column_stack((red_tiles, rows, cols))
+    max_area, corners = get_max_area(tiles, tiles, block_size, partial(fits_inside, prefix_sum))
 
-    # Generate green tiles
-    for (index, tile) in enumerate(red_tiles):
-        row = int(tile[0])
-        col = int(tile[1])
+    logger.debug("Corner 1: %s; Corner 2: %s; Area: %s", *(corners or (None, None)), max_area)
+    return max_area, corners
 
-        all_tiles.add((row, col, "red"))
+def solve_rectangle_one(tile_map, logger):
+    return get_largest_rectangle_one(tile_map, logger)[0]
 
-        for next_tile in red_tiles[index:]:
-            next_row = int(next_tile[0])
-            next_col = int(next_tile[1])
+def solve_rectangle_two(tile_map, logger):
+    return get_largest_rectangle_two(tile_map, logger)[0]
 
-            if row != next_row and col != next_col:
-                continue
+def draw_segment(canvas, start, end, colour):
+    # Only straight lines, as the loop and the rectangles are made of
+    (start_x, start_y), (end_x, end_y) = start, end
+    canvas[min(start_y, end_y):max(start_y, end_y) + 1, min(start_x, end_x):max(start_x, end_x) + 1] = colour
 
-            if row == next_row:
-                start = min(col, next_col)
-                finish = max(col, next_col)
-
-                while start < finish:
-                    all_tiles.add((row, start, "green"))
-                    start += 1
-
-            if col == next_col:
-                start = min(row, next_row)
-                finish = max(row, next_row)
-
-                while start < finish:
-                    all_tiles.add((start, col, "green"))
-                    start += 1
-
-    rows = defaultdict(list)
-    cols = defaultdict(list)
-    result = set()
-
-    for x, y, t in all_tiles:
-        rows[x].append((y,t))
-        cols[y].append((x,t))
-
-    # Fill horizontal gaps
-    for x, ys in rows.items():
-        ys = sorted(ys)
-        for i in range(len(ys) - 1):
-            start, end = ys[i][0], ys[i+1][0]
-            result.add((x, start, ys[i][0]))
-            result.add((x, end, ys[i+1][0]))
-
-            for y in range(start, end + 1):
-                result.add((x, y, "green"))
-
-    # Fill vertical gaps
-    for y, xs in cols.items():
-        xs = sorted(xs)
-        for i in range(len(xs) - 1):
-            start, end = xs[i][0], xs[i+1][0]
-            for x in range(start, end + 1):
-                result.add((x, y, "green"))
-
-    for tile in all_tiles:
-        if tile[2] == "red":
-            result.remove((tile[0],tile[1],"green"))
-            result.add(tile)
-
-    # Find biggest rectangles
-    for (index, tile) in enumerate(result):
-        row = int(tile[0])
-        col = int(tile[1])
-        tile_type = tile[2]
-
-        if tile_type != "red":
+def render_tile_map(path, tile_map, rectangles, size=RENDER_SIZE):
+    red_tiles = tile_map[0]
+    if not len(red_tiles):
+        raise ValueError("No red tiles to render")
+
+    # The longest side of the loop fits the canvas, whatever the coordinates
+    origin = red_tiles.min(axis=0)
+    span = red_tiles.max(axis=0) - origin
+    scale = (size - 1) / max(int(span.max()), 1)
+    width, height = (span * scale).astype(np.int64) + 1
+    canvas = np.full((height, width), BACKGROUND, dtype=np.uint8)
+
+    def to_canvas(tile):
+        return ((np.asarray(tile) - origin) * scale).astype(np.int64).tolist()
+
+    points = ((red_tiles - origin) * scale).astype(np.int64).tolist()
+    for point, next_point in zip(points, points[1:] + points[:1]):
+        draw_segment(canvas, point, next_point, LOOP)
+    canvas[ndimage.binary_fill_holes(canvas == LOOP) & (canvas == BACKGROUND)] = INSIDE
+
+    for colour, corners in rectangles:
+        if corners is None:
             continue
+        (first_x, first_y), (second_x, second_y) = map(to_canvas, corners)
+        for start, end in (((first_x, first_y), (second_x, first_y)), ((second_x, first_y), (second_x, second_y)), ((second_x, second_y), (first_x, second_y)), ((first_x, second_y), (first_x, first_y))):
+            draw_segment(canvas, start, end, colour)
 
-        third = (0, 0, tile_type)
-        fourth = (0, 0, tile_type)
-
-        for next_tile in result:
-            if tile == next_tile:
-                continue
-            next_row = int(next_tile[0])
-            next_col = int(next_tile[1])
-
-            if row == next_row or col == next_col:
-                continue
-
-            diff_col = abs(col - next_col + 1)
-
-            if row > next_row:
-                diff_row = row - next_row + 1
-                third = (row, next_col, "red")
-                fourth = (next_row, col, "red")
-            else:
-                diff_row = next_row - row + 1
-                third = (next_row, col, "red")
-                fourth = (row, next_col, "red")
-
-            area = diff_row * diff_col
-            if third not in all_tiles or fourth not in all_tiles:
-                continue
+    write_image(path, canvas, PALETTE)
 
-            rectangle_areas.append(area)
-
-    return max(rectangle_areas)
+# Entry points used by the aoc runner, by part number
+PARTS = {
+    1: lambda path, logger: solve_rectangle_one(read_file(path), logger),
+    2: lambda path, logger: solve_rectangle_two(read_file(path), logger),
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Read file and split each line into digits.")
@@ -247,6 +185,17 @@ def main():
         help="Enable debug output"
     )
 
+    parser.add_argument(
+        "-r", "--render",
+        help="Draw the tiles and both rectangles to this .png or .pbm file"
+    )
+    parser.add_argument(
+        "--render-size",
+        type=int,
+        default=RENDER_SIZE,
+        help=f"Longest side of the drawing in pixels (default: {RENDER_SIZE})"
+    )
+
     args = parser.parse_args()
 
     logger = Logger(debug=args.debug)
@@ -255,8 +204,14 @@ def main():
 
     logger.debug(tile_map)
 
-    logger.info(f"Max rectangle area for round 1 : {solve_rectangle_one(tile_map, logger)}")
-    logger.info(f"Max rectangle area for round 2 : {solve_rectangle_two(tile_map, logger)}")
+    max_area_one, corners_one = get_largest_rectangle_one(tile_map, logger)
+    max_area_two, corners_two = get_largest_rectangle_two(tile_map, logger)
+
+    logger.info(f"Max rectangle area for round 1 : {max_area_one}")
+    logger.info(f"Max rectangle area for round 2 : {max_area_two}")
+
+    if args.render:
+        render_tile_map(args.render, tile_map, [(RECTANGLE_ONE, corners_one), (RECTANGLE_TWO, corners_two)], args.render_size)
 
 if __name__ == "__main__":
     main()
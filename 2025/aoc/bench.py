@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import numpy as np
+
+from aoc.generators import GENERATORS, write_input
+from aoc.logger import Logger
+from aoc.runner import YEAR_DIR, discover_days, load_day
+
+def run_benchmark(day, part, input_path, timeout):
+    command = [sys.executable, "-m", "aoc", str(day), "-p", str(part), "-i", input_path, "--json"]
+
+    # Own session so that a timed out run can be killed with all its workers
+    process = subprocess.Popen(command, cwd=YEAR_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        output, _ = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.communicate()
+        return {"error": "timeout"}
+
+    results = json.loads(output) if output else []
+    if not results:
+        return {"error": f"runner exited with {process.returncode}"}
+    return results[0]
+
+def fit_exponent(sizes, times):
+    # Slope of log(time) against log(size): 1 is linear, 2 quadratic...
+    if len(sizes) < 2:
+        return None
+    slope, _ = np.polyfit(np.log(sizes), np.log(np.maximum(times, 1e-6)), 1)
+    return float(slope)
+
+def find_regressions(results, baseline, tolerance, min_delta):
+    regressions = []
+
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]
+
+        for size, wall_time in expected["wall_time"].items():
+            if size not in result["wall_time"]:
+                if size in result["errors"]:
+                    regressions.append(f"{key} at {size}x: {result['errors'][size]}, was {wall_time:.3f}s")
+                continue
+            current = result["wall_time"][size]
+            if current > wall_time * (1 + tolerance) and current - wall_time > min_delta:
+                regressions.append(f"{key} at {size}x: {current:.3f}s, was {wall_time:.3f}s")
+
+        if result["exponent"] is not None and expected["exponent"] is not None:
+            if result["exponent"] > expected["exponent"] + tolerance:
+                regressions.append(f"{key} scales as n^{result['exponent']:.2f}, was n^{expected['exponent']:.2f}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the 2025 puzzles on growing synthetic inputs.")
+    parser.add_argument("days", nargs="*", type=int, help="Days to benchmark (default: all)")
+    parser.add_argument(
+        "-p", "--part",
+        type=int,
+        action="append",
+        choices=(1, 2),
+        help="Parts to benchmark (default: all)"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 1000],
+        help="Input sizes relative to the real input (default: 1 10 100 1000)"
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed for the inputs (default: 0)")
+    parser.add_argument(
+        "-t", "--timeout",
+        type=float,
+        default=60,
+        help="Seconds before a run is abandoned, bigger sizes are then skipped (default: 60)"
+    )
+    parser.add_argument("--work-dir", help="Where to keep the generated inputs (default: a temporary directory)")
+    parser.add_argument("--save-baseline", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file and fail on regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown, or exponent increase, counted as a regression (default: 0.25)"
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.05,
+        help="Slowdowns shorter than this many seconds are ignored (default: 0.05)"
+    )
+    parser.add_argument(
+        "-d", "--debug",
+        action="store_true",
+        help="Enable debug output"
+    )
+
+    args = parser.parse_args()
+
+    logger = Logger(debug=args.debug)
+
+    days = discover_days()
+    selected = [day for day in (args.days or list(days)) if day in days and day in GENERATORS]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="aoc-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+
+    results = {}
+    for day in selected:
+        parts = [part for part in sorted(load_day(days[day]).PARTS) if not args.part or part in args.part]
+        timed_out = set()
+
+        for size in sorted(args.sizes):
+            input_path = os.path.join(work_dir, f"D{day}_{size}x_{args.seed}.txt")
+            if not os.path.exists(input_path):
+                logger.debug(f"Generating day {day} at {size}x in {input_path}")
+                write_input(day, size, args.seed, input_path)
+
+            for part in parts:
+                key = f"D{day}.{part}"
+                result = results.setdefault(key, {"wall_time": {}, "cpu_time": {}, "peak_rss": {}, "errors": {}, "exponent": None})
+                if part in timed_out:
+                    continue
+
+                run = run_benchmark(day, part, input_path, args.timeout)
+                if "error" in run:
+                    logger.warning(f"{key} at {size}x: {run['error']}")
+                    result["errors"][str(size)] = run["error"]
+                    timed_out.add(part)
+                    continue
+
+                logger.info(f"{key} at {size}x: {run['wall_time']:.3f}s wall, {run['cpu_time']:.3f}s CPU, {run['peak_rss'] / (1024 * 1024):.1f} MiB")
+                result["wall_time"][str(size)] = run["wall_time"]
+                result["cpu_time"][str(size)] = run["cpu_time"]
+                result["peak_rss"][str(size)] = run["peak_rss"]
+
+        for part in parts:
+            result = results[f"D{day}.{part}"]
+            sizes = [int(size) for size in result["wall_time"]]
+            result["exponent"] = fit_exponent(sizes, list(result["wall_time"].values()))
+            if result["exponent"] is not None:
+                logger.info(f"D{day}.{part} scales as n^{result['exponent']:.2f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance, args.min_delta)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import bisect
+import numpy as np
+
+from array import array
+
+class DisjointSet:
+    def __init__(self, count):
+        self.parent = array("i", range(count))
+        self.size = array("i", [1]) * count
+        self.components = count
+
+        # How many components have each size, and the sizes in use in order,
+        # so that the largest components are read from the end
+        self.histogram = {1: count} if count else {}
+        self.sizes = [1] if count else []
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, item):
+        parent = self.parent
+        # Path halving: every other node on the way points to its grandparent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def _count_size(self, size, delta):
+        count = self.histogram.get(size, 0) + delta
+        if count:
+            if size not in self.histogram:
+                bisect.insort(self.sizes, size)
+            self.histogram[size] = count
+        else:
+            del self.histogram[size]
+            del self.sizes[bisect.bisect_left(self.sizes, size)]
+
+    def union(self, first, second):
+        first = self.find(first)
+        second = self.find(second)
+        if first == second:
+            return False
+
+        # Union by size, the smaller tree goes under the larger one
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self._count_size(self.size[first], -1)
+        self._count_size(self.size[second], -1)
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        self._count_size(self.size[first], 1)
+        self.components -= 1
+        return True
+
+    def roots(self, items):
+        # Vectorised find over the shared buffer, following all parents at once
+        parent = np.frombuffer(self.parent, dtype=np.intc)
+        roots = parent[items]
+        while True:
+            grandparents = parent[roots]
+            if np.array_equal(grandparents, roots):
+                return roots
+            roots = grandparents
+
+    def union_pairs(self, first, second):
+        first = np.asarray(first, dtype=np.intc)
+        second = np.asarray(second, dtype=np.intc)
+        merged = np.zeros(len(first), dtype=bool)
+
+        # Components only ever grow, so pairs already in one of them are
+        # skipped without a Python loop and only the others are joined in order
+        candidates = np.flatnonzero(self.roots(first) != self.roots(second))
+        for index, first_item, second_item in zip(candidates.tolist(), first[candidates].tolist(), second[candidates].tolist()):
+            merged[index] = self.union(first_item, second_item)
+        return merged
+
+    def largest(self, count):
+        result = []
+        for size in reversed(self.sizes):
+            result.extend([size] * min(self.histogram[size], count - len(result)))
+            if len(result) == count:
+                break
+        return result
@@ -0,0 +1,101 @@
+import atexit
+import os
+import multiprocessing as mp
+
+from multiprocessing import resource_tracker
+from multiprocessing.pool import ThreadPool
+
+BACKENDS = ("serial", "thread", "process")
+
+class Executor:
+    def __init__(self, backend="process", jobs=None, serial_below=32):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+
+        self.backend = backend
+        self.jobs = jobs or os.cpu_count() or 1
+        self.serial_below = serial_below
+        self._pool = None
+
+    def _get_pool(self):
+        # Started on first use, then kept warm for every later call
+        if self._pool is None and self.backend == "thread":
+            self._pool = ThreadPool(self.jobs)
+        elif self._pool is None:
+            # Workers share the resource tracker of the parent instead of each
+            # starting one that would clean up segments it only attached to
+            resource_tracker.ensure_running()
+            self._pool = mp.Pool(self.jobs)
+        return self._pool
+
+    def start(self):
+        # Workers forked later inherit every mapping of the parent, shared
+        # memory segments included, so callers start them before making any
+        if self.backend != "serial":
+            self._get_pool()
+
+    def is_serial(self, items):
+        return self.backend == "serial" or self.jobs == 1 or len(items) < self.serial_below
+
+    def get_chunksize(self, items):
+        # About 4 chunks per worker: enough to balance, and fn is only
+        # pickled once per chunk
+        return max(1, -(-len(items) // (self.jobs * 4)))
+
+    def map(self, fn, items, chunksize=None, serial=None):
+        if serial is None:
+            serial = self.is_serial(items)
+        if serial:
+            return [fn(item) for item in items]
+        return self._get_pool().map(fn, items, chunksize or self.get_chunksize(items))
+
+    def imap_unordered(self, fn, items, chunksize=None, serial=None):
+        if serial is None:
+            serial = self.is_serial(items)
+        if serial:
+            return map(fn, items)
+        return self._get_pool().imap_unordered(fn, items, chunksize or self.get_chunksize(items))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+_executor = None
+
+def add_executor_arguments(parser):
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Number of workers (default: one per CPU)"
+    )
+    parser.add_argument(
+        "-b", "--backend",
+        choices=BACKENDS,
+        default="process",
+        help="Run the workers serially, in threads or in processes (default: process)"
+    )
+
+def configure_executor(backend="process", jobs=None, serial_below=32):
+    global _executor
+    shutdown_executor()
+    _executor = Executor(backend, jobs, serial_below)
+    return _executor
+
+def configure_executor_from_args(args):
+    return configure_executor(backend=args.backend, jobs=args.jobs)
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = Executor()
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.close()
+        _executor = None
+
+atexit.register(shutdown_executor)
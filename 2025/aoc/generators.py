@@ -0,0 +1,213 @@
+import argparse
+import math
+import random
+
+# Every generator yields the lines of an input about `scale` times the size of
+# the real one, drawn from the given random.Random so that a seed fixes the file
+
+def generate_rotations(scale, rng):
+    for _ in range(4777 * scale):
+        yield f"{rng.choice('LR')}{rng.randint(1, 999)}"
+
+def generate_idranges(scale, rng):
+    idranges = []
+    for _ in range(35):
+        digits = rng.randint(1, 10)
+        range_start = rng.randint(10 ** (digits - 1), 10 ** digits - 1)
+        # Wider ranges, not more of them
+        range_end = range_start + rng.randint(0, 250000) * scale
+        idranges.append(f"{range_start}-{range_end}")
+    yield ",".join(idranges)
+
+def generate_batteries(scale, rng):
+    for _ in range(200 * scale):
+        yield "".join(rng.choice("123456789") for _ in range(100))
+
+def generate_rolls(scale, rng):
+    side = round(138 * math.sqrt(scale))
+    for _ in range(side):
+        yield "".join("@" if rng.random() < 0.65 else "." for _ in range(side))
+
+def generate_cafeteria(scale, rng):
+    for _ in range(190 * scale):
+        range_start = rng.randint(1, 560 * 10 ** 12)
+        yield f"{range_start}-{range_start + rng.randint(0, 10 ** 13)}"
+    yield ""
+    for _ in range(1000 * scale):
+        yield str(rng.randint(1, 560 * 10 ** 12))
+
+def generate_worksheet(scale, rng):
+    rows = [[] for _ in range(5)]
+
+    for _ in range(1000 * scale):
+        width = rng.randint(1, 4)
+        align = rng.choice((str.ljust, str.rjust))
+        # The widest number sets the width of the problem, as in the real worksheets
+        lengths = [rng.randint(1, width) for _ in range(3)] + [width]
+        rng.shuffle(lengths)
+        for row, length in zip(rows[:4], lengths):
+            number = str(rng.randint(1, 9)) + "".join(rng.choice("0123456789") for _ in range(length - 1))
+            row.append(align(number, width))
+        rows[4].append(rng.choice("+*").ljust(width))
+
+    for row in rows:
+        yield " ".join(row)
+
+def generate_manifold(scale, rng):
+    width = 2 * round(70 * math.sqrt(scale)) + 1
+    height = 2 * round(71 * math.sqrt(scale))
+    center = width // 2
+
+    yield "." * center + "S" + "." * center
+    for line in range(1, height):
+        level = line // 2 - 1
+        row = ["."] * width
+        # Splitters sit on every other line, inside the cone the beams can reach
+        if line % 2 == 0:
+            for col in range(max(1, center - level), min(width - 1, center + level + 1)):
+                if (col - center - level) % 2 == 0 and rng.random() < 0.68:
+                    row[col] = "^"
+        yield "".join(row)
+
+def generate_junctionboxes(scale, rng):
+    for _ in range(1000 * scale):
+        yield f"{rng.randrange(100000)},{rng.randrange(100000)},{rng.randrange(100000)}"
+
+def randint_except(rng, low, high, excluded):
+    # Uniform over [low, high] without the excluded value
+    value = rng.randint(low, high - 1)
+    return value + 1 if value >= excluded else value
+
+def generate_red_tiles(scale, rng):
+    # An x-monotone orthogonal polygon: a staircase on top, another one below
+    columns = 124 * scale
+    max_coord = max(100000, 4 * columns)
+    middle = max_coord // 2
+
+    xs = sorted(rng.sample(range(1, max_coord), columns + 1))
+    tops = [rng.randint(middle + 1, max_coord)]
+    bottoms = [rng.randint(1, middle - 1)]
+    for _ in range(columns - 1):
+        tops.append(randint_except(rng, middle + 1, max_coord, tops[-1]))
+        bottoms.append(randint_except(rng, 1, middle - 1, bottoms[-1]))
+
+    for index in range(columns):
+        yield f"{xs[index]},{tops[index]}"
+        yield f"{xs[index + 1]},{tops[index]}"
+    for index in range(columns - 1, -1, -1):
+        yield f"{xs[index + 1]},{bottoms[index]}"
+        yield f"{xs[index]},{bottoms[index]}"
+
+def generate_machines(scale, rng):
+    for _ in range(178 * scale):
+        num_lights = rng.randint(4, 10)
+        buttons = [sorted(rng.sample(range(num_lights), rng.randint(1, num_lights))) for _ in range(rng.randint(max(1, num_lights - 2), num_lights + 3))]
+
+        # Lights and joltages both come from real presses so that every machine is solvable
+        lights = [False] * num_lights
+        while not any(lights):
+            for button in rng.sample(buttons, rng.randint(1, len(buttons))):
+                for light in button:
+                    lights[light] = not lights[light]
+
+        joltages = [0] * num_lights
+        for button in buttons:
+            presses = rng.randint(0, 20)
+            for light in button:
+                joltages[light] += presses
+
+        lights = "".join("#" if light else "." for light in lights)
+        buttons = " ".join("(" + ",".join(str(light) for light in button) + ")" for button in buttons)
+        yield f"[{lights}] {buttons} {{{','.join(str(joltage) for joltage in joltages)}}}"
+
+def get_device_name(index):
+    name = ""
+    while index or len(name) < 3:
+        index, letter = divmod(index, 26)
+        name = chr(ord("a") + letter) + name
+    return name
+
+def generate_reactor(scale, rng):
+    # Deeper and wider layered DAG, every device eventually reaches out
+    layers = max(4, round(12 * math.sqrt(scale)))
+    per_layer = max(2, 611 * scale // layers)
+    reserved = {"svr", "you", "fft", "dac", "out"}
+
+    names = (name for name in map(get_device_name, range(10 ** 9)) if name not in reserved)
+    graph = [[next(names) for _ in range(per_layer)] for _ in range(layers)]
+    graph[0][0] = "svr"
+    graph[1][0] = "you"
+    graph[layers // 3][0] = "fft"
+    graph[2 * layers // 3][0] = "dac"
+
+    connections = {}
+    for depth, layer in enumerate(graph):
+        for device in layer:
+            if depth == layers - 1:
+                connections[device] = ["out"]
+                continue
+            targets = graph[depth + 1] + (graph[depth + 2] if depth + 2 < layers else [])
+            connections[device] = rng.sample(targets, rng.randint(1, min(4, len(targets))))
+
+    # Make sure svr -> fft -> dac -> out exists
+    for depth in range(layers - 1):
+        device = graph[depth][0]
+        if graph[depth + 1][0] not in connections[device]:
+            connections[device].append(graph[depth + 1][0])
+
+    for device, targets in connections.items():
+        yield f"{device}: {' '.join(targets)}"
+
+SHAPES = [
+    ["##.", ".##", "..#"],
+    ["#.#", "###", "#.#"],
+    ["###", "#..", "###"],
+    ["###", ".#.", "###"],
+    ["##.", "###", "##."],
+    [".##", "###", "##."],
+]
+
+def generate_regions(scale, rng):
+    for index, shape in enumerate(SHAPES):
+        yield f"{index}:"
+        yield from shape
+        yield ""
+    for _ in range(1000 * scale):
+        counts = " ".join(str(rng.randint(20, 60)) for _ in SHAPES)
+        yield f"{rng.randint(35, 50)}x{rng.randint(35, 50)}: {counts}"
+
+GENERATORS = {
+    1: generate_rotations,
+    2: generate_idranges,
+    3: generate_batteries,
+    4: generate_rolls,
+    5: generate_cafeteria,
+    6: generate_worksheet,
+    7: generate_manifold,
+    8: generate_junctionboxes,
+    9: generate_red_tiles,
+    10: generate_machines,
+    11: generate_reactor,
+    12: generate_regions,
+}
+
+def write_input(day, scale, seed, path):
+    rng = random.Random(f"{day}:{scale}:{seed}")
+    with open(path, "w") as f:
+        for line in GENERATORS[day](scale, rng):
+            f.write(line)
+            f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic input for a day.")
+    parser.add_argument("day", type=int, choices=sorted(GENERATORS), help="Day to generate an input for")
+    parser.add_argument("scale", type=int, help="Size of the input relative to the real one")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("-o", "--output", default="/dev/stdout", help="Output file (default: stdout)")
+
+    args = parser.parse_args()
+
+    write_input(args.day, args.scale, args.seed, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import mmap
+import numpy as np
+
+from numpy.lib.stride_tricks import as_strided
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+def load_grid(path):
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise ValueError(f"{path} is empty, expected a character grid")
+
+    # The array keeps the mapping alive once the file is closed
+    raw = np.frombuffer(data, dtype=np.uint8)
+
+    # Ignore trailing blank lines
+    end = len(raw)
+    while end > 0 and raw[end - 1] in (NEWLINE, CARRIAGE_RETURN):
+        end -= 1
+    if end == 0:
+        raise ValueError(f"{path} is empty, expected a character grid")
+    raw = raw[:end]
+
+    newlines = np.flatnonzero(raw == NEWLINE)
+    cols = int(newlines[0]) if len(newlines) else end
+    separator = 1
+    if cols > 0 and raw[cols - 1] == CARRIAGE_RETURN:
+        cols -= 1
+        separator = 2
+
+    stride = cols + separator
+    rows = len(newlines) + 1
+
+    # Every line must end exactly one stride after the previous one
+    if cols == 0 or (end + separator) != rows * stride or np.any(newlines != np.arange(rows - 1) * stride + stride - 1):
+        raise ValueError(f"{path} is not a rectangular grid of {cols} columns")
+
+    # View the rows side by side, skipping the line separators, without copying
+    return as_strided(raw, shape=(rows, cols), strides=(stride, 1), writeable=False)
+
+def load_padded_grid(path, fill=" "):
+    raw = np.fromfile(path, dtype=np.uint8)
+
+    # Ignore trailing blank lines
+    end = len(raw)
+    while end > 0 and raw[end - 1] in (NEWLINE, CARRIAGE_RETURN):
+        end -= 1
+    if end == 0:
+        raise ValueError(f"{path} is empty, expected a character grid")
+    raw = raw[:end]
+
+    # Line separators, with the carriage return before a newline
+    is_newline = raw == NEWLINE
+    is_separator = is_newline.copy()
+    is_separator[:-1] |= (raw[:-1] == CARRIAGE_RETURN) & is_newline[1:]
+    kept = np.cumsum(~is_separator)
+    lengths = np.diff(kept[np.flatnonzero(is_newline)], prepend=0, append=kept[-1])
+
+    # Lines of any length, padded on the right up to the longest one
+    grid = np.full((len(lengths), int(lengths.max())), ord(fill), dtype=np.uint8)
+    grid[np.arange(grid.shape[1]) < lengths[:, None]] = raw[~is_separator]
+    return grid
+
+def grid_to_digits(grid):
+    return grid - np.uint8(ord("0"))
+
+def grid_to_bool(grid, char):
+    return grid == ord(char)
+
+def grid_to_bits(grid, char, block_rows=4096):
+    rows, cols = grid.shape
+    packed = np.zeros((rows, -(-cols // 64)), dtype="<u8")
+
+    # Column c is bit c % 64 of word c // 64, packed a block of rows at a time
+    # so that the boolean temporaries stay small
+    packed_bytes = packed.view(np.uint8)
+    for start in range(0, rows, block_rows):
+        bits = np.packbits(grid[start:start + block_rows] == ord(char), axis=1, bitorder="little")
+        packed_bytes[start:start + block_rows, :bits.shape[1]] = bits
+
+    return packed
@@ -0,0 +1,42 @@
+import struct
+import zlib
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+def write_pbm(path, canvas):
+    # Binary bitmap, any non zero pixel is black
+    height, width = canvas.shape
+    with open(path, "wb") as f:
+        f.write(f"P4\n{width} {height}\n".encode())
+        for row in canvas:
+            f.write(np.packbits(row != 0).tobytes())
+
+def write_png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+def write_png(path, canvas, palette):
+    # Indexed colours, one byte per pixel, compressed a row at a time
+    height, width = canvas.shape
+    compressor = zlib.compressobj()
+    with open(path, "wb") as f:
+        f.write(PNG_SIGNATURE)
+        write_png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+        write_png_chunk(f, b"PLTE", bytes(channel for colour in palette for channel in colour))
+        for row in canvas:
+            data = compressor.compress(b"\x00" + row.astype(np.uint8).tobytes())
+            if data:
+                write_png_chunk(f, b"IDAT", data)
+        write_png_chunk(f, b"IDAT", compressor.flush())
+        write_png_chunk(f, b"IEND", b"")
+
+def write_image(path, canvas, palette):
+    if path.lower().endswith(".pbm"):
+        write_pbm(path, canvas)
+    elif path.lower().endswith(".png"):
+        write_png(path, canvas, palette)
+    else:
+        raise ValueError(f"Cannot write {path}, expected a .png or .pbm file")
@@ -0,0 +1,88 @@
+import atexit
+import sys
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {
+    DEBUG: "DEBUG",
+    INFO: "INFO",
+    WARNING: "WARNING",
+    ERROR: "ERROR",
+}
+
+class Logger:
+    def __init__(self, debug=False, stream=None, buffer_size=1 << 16):
+        self.level = DEBUG if debug else INFO
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+        self._second = None
+        self._timestamp = ""
+        atexit.register(self.flush)
+
+    @property
+    def debug_enabled(self):
+        return self.level <= DEBUG
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def __getstate__(self):
+        # Copies sent to pool workers write through, as a worker can be
+        # terminated before it gets a chance to flush
+        state = self.__dict__.copy()
+        state["stream"] = None
+        state["buffer_size"] = 0
+        state["_buffer"] = []
+        state["_buffered"] = 0
+        return state
+
+    def _get_timestamp(self):
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return self._timestamp
+
+    def _log(self, level, msg, args):
+        # Messages are only formatted once we know they will be written
+        if callable(msg):
+            msg = msg()
+        elif args:
+            msg = msg % args
+
+        line = f"[{self._get_timestamp()}] [{LEVEL_NAMES[level]}] {msg}\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+
+        if level > DEBUG or self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        stream = self.stream or sys.stderr
+        stream.write("".join(self._buffer))
+        stream.flush()
+        self._buffer = []
+        self._buffered = 0
+
+    def debug(self, msg, *args):
+        if self.level <= DEBUG:
+            self._log(DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        if self.level <= INFO:
+            self._log(INFO, msg, args)
+
+    def warning(self, msg, *args):
+        if self.level <= WARNING:
+            self._log(WARNING, msg, args)
+
+    def error(self, msg, *args):
+        self._log(ERROR, msg, args)
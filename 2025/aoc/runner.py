@@ -0,0 +1,196 @@
+import argparse
+import glob
+import importlib.util
+import json
+import multiprocessing as mp
+import os
+import re
+import resource
+import sys
+import time
+import traceback
+
+from concurrent.futures import ProcessPoolExecutor
+
+from aoc.executor import shutdown_executor
+from aoc.logger import Logger
+
+YEAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+def discover_days():
+    days = {}
+    for path in glob.glob(os.path.join(YEAR_DIR, "D*", "*.py")):
+        match = re.fullmatch(r"D(\d+)", os.path.basename(os.path.dirname(path)))
+        if match:
+            days[int(match.group(1))] = os.path.normpath(path)
+    return dict(sorted(days.items()))
+
+def load_day(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    # Pools started by the day re-import it by name in their workers
+    day_dir = os.path.dirname(path)
+    if day_dir not in sys.path:
+        sys.path.insert(0, day_dir)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def get_cpu_time(usage):
+    return usage.ru_utime + usage.ru_stime
+
+def get_peak_rss():
+    # ru_maxrss survives exec on Linux and would report the runner's own peak,
+    # VmHWM only covers this process image
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def silence_stdout():
+    # Some days still print their working state, from their pool workers too
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    sys.stdout.flush()
+    os.dup2(devnull, sys.stdout.fileno())
+    os.close(devnull)
+
+def run_part(day, part, day_path, input_path, debug):
+    result = {"day": day, "part": part, "input": input_path}
+    logger = Logger(debug=debug)
+
+    # Days start their pools the same way as when they run on their own
+    if "fork" in mp.get_all_start_methods():
+        mp.set_start_method("fork", force=True)
+
+    try:
+        silence_stdout()
+        module = load_day(day_path)
+        solve = module.PARTS[part]
+
+        self_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter()
+
+        answer = solve(input_path, logger)
+        # Pool workers only count in RUSAGE_CHILDREN once they are joined
+        shutdown_executor()
+
+        result["wall_time"] = time.perf_counter() - start
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        # Days running their own pool spend most of their CPU time in children
+        result["cpu_time"] = (get_cpu_time(self_after) - get_cpu_time(self_before)) + (get_cpu_time(children_after) - get_cpu_time(children_before))
+        # Each part runs in a fresh process, so the peak is this part's (ru_maxrss is in KiB on Linux)
+        result["peak_rss"] = max(get_peak_rss(), children_after.ru_maxrss * 1024)
+        result["answer"] = str(answer)
+    except Exception:
+        result["error"] = traceback.format_exc(limit=-1).strip().splitlines()[-1]
+    finally:
+        logger.flush()
+
+    return result
+
+def format_table(results):
+    header = ("Day", "Part", "Answer", "Wall (s)", "CPU (s)", "Peak RSS (MiB)")
+    rows = []
+    for result in results:
+        if "error" in result:
+            rows.append((str(result["day"]), str(result["part"]), result["error"], "-", "-", "-"))
+            continue
+        rows.append((
+            str(result["day"]),
+            str(result["part"]),
+            result["answer"],
+            f"{result['wall_time']:.3f}",
+            f"{result['cpu_time']:.3f}",
+            f"{result['peak_rss'] / (1024 * 1024):.1f}",
+        ))
+
+    widths = [max(len(row[index]) for row in [header] + rows) for index in range(len(header))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(header, widths))]
+    lines.append("  ".join("-" * width for width in widths))
+    for row in rows:
+        lines.append("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run and time the 2025 puzzles.")
+    parser.add_argument("days", nargs="*", type=int, help="Days to run (default: all)")
+    parser.add_argument(
+        "-p", "--part",
+        type=int,
+        action="append",
+        choices=(1, 2),
+        help="Parts to run (default: all)"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=1,
+        help="Number of parts to run concurrently (default: 1, 0 for all at once)"
+    )
+    parser.add_argument(
+        "-i", "--input",
+        help="Input file to use instead of each day's own"
+    )
+    parser.add_argument(
+        "--demo",
+        action="store_true",
+        help="Use demo_input.txt instead of input.txt"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the results as JSON instead of a table"
+    )
+    parser.add_argument(
+        "-d", "--debug",
+        action="store_true",
+        help="Enable debug output"
+    )
+
+    args = parser.parse_args()
+
+    logger = Logger(debug=args.debug)
+
+    days = discover_days()
+    selected = args.days or list(days)
+    input_name = "demo_input.txt" if args.demo else "input.txt"
+
+    tasks = []
+    for day in selected:
+        if day not in days:
+            logger.error(f"No module found for day {day}")
+            continue
+        try:
+            module = load_day(days[day])
+        except Exception as e:
+            logger.error(f"Cannot load day {day}: {e}")
+            continue
+        for part in sorted(module.PARTS):
+            if args.part and part not in args.part:
+                continue
+            input_path = args.input or os.path.join(os.path.dirname(days[day]), input_name)
+            tasks.append((day, part, days[day], input_path, args.debug))
+
+    jobs = args.jobs or len(tasks) or 1
+    logger.debug(f"Running {len(tasks)} parts with {jobs} jobs")
+
+    # One process per part so that peak RSS and CPU time are not shared between parts
+    with ProcessPoolExecutor(max_workers=jobs, max_tasks_per_child=1) as executor:
+        futures = [executor.submit(run_part, *task) for task in tasks]
+        results = [future.result() for future in futures]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_table(results))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import numpy as np
+
+from multiprocessing.shared_memory import SharedMemory
+
+class SharedRows:
+    def __init__(self, rows, dtype=np.uint8):
+        dtype = np.dtype(dtype)
+
+        if isinstance(rows, np.ndarray) and rows.ndim == 2:
+            lengths = np.full(len(rows), rows.shape[1], dtype=np.int64)
+        else:
+            rows = [np.frombuffer(row, dtype=dtype) if isinstance(row, bytes) else np.asarray(row, dtype=dtype) for row in rows]
+            lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+
+        # One segment: the offset table, then every row back to back
+        self.count = len(lengths)
+        self.length = int(lengths.sum())
+        self.dtype = dtype
+        self._shm = SharedMemory(create=True, size=max(1, 8 * (self.count + 1) + self.length * dtype.itemsize))
+        self.name = self._shm.name
+        self._owner = True
+        self._map()
+
+        self.offsets[0] = 0
+        np.cumsum(lengths, out=self.offsets[1:])
+        if isinstance(rows, np.ndarray):
+            self.data[:] = rows.ravel()
+        elif self.length:
+            np.concatenate(rows, out=self.data)
+
+    def _map(self):
+        self.offsets = np.ndarray((self.count + 1,), dtype=np.int64, buffer=self._shm.buf)
+        self.data = np.ndarray((self.length,), dtype=self.dtype, buffer=self._shm.buf, offset=8 * (self.count + 1))
+
+    def __getstate__(self):
+        # Workers only receive the segment name, whatever the size of the rows
+        return {"name": self.name, "count": self.count, "length": self.length, "dtype": self.dtype.str}
+
+    def __setstate__(self, state):
+        self.name = state["name"]
+        self.count = state["count"]
+        self.length = state["length"]
+        self.dtype = np.dtype(state["dtype"])
+        self._owner = False
+        self._shm = SharedMemory(name=self.name)
+        self._map()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]]
+
+    def block(self, start, end):
+        # Rows start to end back to back, for callers working on many rows at once
+        return self.data[self.offsets[start]:self.offsets[end]]
+
+    def close(self):
+        if self._shm is None:
+            return
+        # Views on the buffer must go before the segment can be closed
+        self.offsets = self.data = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __del__(self):
+        # Copies in the workers let go of the segment as soon as their task
+        # is done with them, only the owner closes it explicitly
+        if not getattr(self, "_owner", True):
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def split_rows(count, parts):
+    size = max(1, -(-count // parts))
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+def sum_over_rows(fn, rows, bounds):
+    return sum(fn(rows[index]) for index in range(*bounds))